@@ -1,49 +1,158 @@
-import pandas as pd
+import argparse
 import json
 import os
 
+from insa_workbook import list_sheet_names, iter_sheet_records
+from table_delta import new_delta, track_changes, save_delta, DELTA_FILE
+from nutrient_schema import compile_row_formatter
+
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+
+# Sheet principal com os dados nutricionais (o sufixo muda a cada versão,
+# ex: INSA_TCA_v7.0_2025)
+SHEET_PREFIX = 'INSA_TCA_'
+
+# A primeira linha da sheet é um título; os headers reais estão na segunda
+HEADER_ROW = 2
+
+
+def _json_array_item(record, first):
+    """Texto de um elemento de um array JSON com indent=2."""
+    separator = '\n  ' if first else ',\n  '
+    return separator + json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+
+
+def write_json_array(records, output_file):
+    """
+    Escreve os registos como um array JSON indentado, um registo de cada vez.
+    O resultado é idêntico ao de json.dump(lista, indent=2).
+    """
+    count = 0
+    first = None
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for record in records:
+            if count == 0:
+                first = record
+            f.write(_json_array_item(record, count == 0))
+            count += 1
+        f.write('\n]' if count else ']')
+
+    return count, first
+
+
+def tee_formatted(records, output_file, format_row):
+    """
+    Escreve format_row(registo) num segundo array JSON à medida que os
+    registos passam, devolvendo-os inalterados. Permite gerar a tabela
+    formatada (etapa 02) na mesma passagem, sem voltar a ler o JSON bruto.
+    """
+    count = 0
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for record in records:
+            f.write(_json_array_item(format_row(record), count == 0))
+            count += 1
+            yield record
+        f.write('\n]' if count else ']')
+
+
+def write_ndjson(records, output_file):
+    """Escreve os registos como NDJSON (um objeto JSON por linha)."""
+    count = 0
+    first = None
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for record in records:
+            if count == 0:
+                first = record
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+
+    return count, first
+
+
+def find_data_sheet(sheet_names):
+    """Escolhe a sheet de dados INSA (a última, se houver várias versões)."""
+    candidates = [name for name in sheet_names if name.startswith(SHEET_PREFIX)]
+    if not candidates:
+        raise ValueError(f"Nenhuma sheet começa por '{SHEET_PREFIX}'. Use --sheet. Disponíveis: {sheet_names}")
+    return candidates[-1]
+
 
-# Ler o arquivo Excel
-excel_file = os.path.join(RAW_DATA_DIR, 'insa_tca.xlsx')
+def main():
+    parser = argparse.ArgumentParser(description='Extrai a tabela INSA do Excel para JSON.')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Escrever NDJSON (tabela_alimentar_portugal.ndjson) em vez de um array JSON')
+    parser.add_argument('--workbook', default=os.path.join(RAW_DATA_DIR, 'insa_tca.xlsx'),
+                        help='Ficheiro Excel da INSA (por omissão raw-data/insa_tca.xlsx)')
+    parser.add_argument('--sheet', help=f"Nome da sheet de dados (por omissão, a que começa por '{SHEET_PREFIX}')")
+    parser.add_argument('--delta', action='store_true',
+                        help='Comparar com a tabela anterior e gravar raw-data/tabela_alimentar_delta.json')
+    parser.add_argument('--format', action='store_true',
+                        help='Gerar também output/tabela_alimentar_formatada.json (substitui a etapa 02)')
+    args = parser.parse_args()
 
-# Ler todas as sheets disponíveis
-xls = pd.ExcelFile(excel_file)
-print(f"Sheets disponíveis: {xls.sheet_names}")
+    # Ler o arquivo Excel
+    excel_file = args.workbook
+    sheet_names = list_sheet_names(excel_file)
+    print(f"Sheets disponíveis: {sheet_names}")
+    sheet_name = args.sheet or find_data_sheet(sheet_names)
+    print(f"Sheet de dados: {sheet_name}")
 
-# Ler a sheet principal com os dados nutricionais
-# A primeira linha contém os headers reais
-df = pd.read_excel(excel_file, sheet_name='INSA_TCA_v7.0_2025', header=0)
+    # Cada linha da sheet segue diretamente para o ficheiro de saída
+    records = iter_sheet_records(excel_file, sheet_name, header_row=HEADER_ROW)
 
-# Usar a primeira linha como headers
-new_columns = df.iloc[0].tolist()
-df.columns = new_columns
-df = df.drop(0).reset_index(drop=True)
+    delta = None
+    if args.delta:
+        previous_file = os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json')
+        if not os.path.exists(previous_file):
+            raise FileNotFoundError(f"{previous_file} não existe: execute primeiro sem --delta")
+        with open(previous_file, 'r', encoding='utf-8') as f:
+            previous_rows = json.load(f)
+        delta = new_delta(os.path.basename(excel_file), sheet_name, len(previous_rows))
+        records = track_changes(records, previous_rows, delta)
 
-print(f"\nDimensões da tabela: {df.shape}")
-print(f"\nColunas:\n{df.columns.tolist()}")
-print(f"\nPrimeiras 3 linhas:")
-print(df.head(3).to_string())
+    formatted_file = None
+    if args.format:
+        formatted_file = os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json')
+        format_row, _ = compile_row_formatter()
+        records = tee_formatted(records, formatted_file, format_row)
 
-# Converter para JSON
-# Remover linhas com todos os valores NaN
-df_clean = df.dropna(how='all')
+    if args.ndjson:
+        output_file = os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.ndjson')
+        total, first = write_ndjson(records, output_file)
+    else:
+        output_file = os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json')
+        total, first = write_json_array(records, output_file)
 
-# Limpar espaços em branco nos nomes das colunas
-df_clean.columns = [str(col).strip().replace('\n', ' ') for col in df_clean.columns]
+    print(f"\n✓ Dados extraídos com sucesso!")
+    print(f"✓ Total de alimentos: {total}")
+    print(f"✓ Arquivo salvo: {output_file}")
+    if formatted_file:
+        print(f"✓ Tabela formatada salva: {formatted_file}")
 
-# Converter para dicionário
-data = df_clean.to_dict(orient='records')
+    if delta is not None:
+        save_delta(delta)
+        stats = delta['metadata']
+        print(f"\n📊 DELTA EM RELAÇÃO À VERSÃO ANTERIOR ({stats['previous_total']} alimentos):")
+        print(f"   Adicionados: {stats['added']}")
+        print(f"   Alterados: {stats['changed']}")
+        print(f"   Removidos: {stats['removed']}")
+        print(f"   Sem alterações: {stats['unchanged']}")
+        print(f"✓ Delta salvo: {DELTA_FILE}")
+        print("  Próximas etapas: 02, 03, 05 e 07 com --delta")
+    if first is not None:
+        print(f"\nColunas ({len(first)}):\n{list(first.keys())}")
+        print(f"\nExemplo de um alimento:")
+        print(json.dumps(first, ensure_ascii=False, indent=2))
 
-# Salvar como JSON
-output_file = os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json')
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
 
-print(f"\n✓ Dados extraídos com sucesso!")
-print(f"✓ Total de alimentos: {len(data)}")
-print(f"✓ Arquivo salvo: {output_file}")
-print(f"\nExemplo de um alimento:")
-print(json.dumps(data[0], ensure_ascii=False, indent=2))
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,73 @@
+import argparse
 import json
-import re
 import os
 
+from table_delta import load_delta, apply_delta
+from text_normalization import normalize_name
+
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
 
-def normalize_name(name):
+
+
+def build_food_entry(item):
     """
-    Normaliza o nome do alimento para facilitar matching.
+    Extrai o nome (e variantes normalizadas) de uma linha da tabela.
+    Devolve None se a linha não tiver nome.
     """
-    if not name:
-        return ""
-    
-    # Converter para minúsculas
-    name = name.lower()
-    
-    # Remover acentos comuns em português
-    replacements = {
-        'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-        'é': 'e', 'ê': 'e',
-        'í': 'i',
-        'ó': 'o', 'ô': 'o', 'õ': 'o',
-        'ú': 'u', 'ü': 'u',
-        'ç': 'c'
+    food_name = item.get('Nome do alimento', '')
+    if not food_name:
+        return None
+    
+    # Separar por vírgula se houver variações
+    # Ex: "Abacate, Hass" -> ["Abacate", "Hass"]
+    name_parts = [part.strip() for part in food_name.split(',')]
+    main_name = name_parts[0]
+    variation = name_parts[1] if len(name_parts) > 1 else None
+    
+    return {
+        'code': item.get('Cod'),
+        'original_name': food_name,
+        'main_name': main_name,
+        'variation': variation,
+        'normalized_name': normalize_name(food_name),
+        'normalized_main': normalize_name(main_name),
+        'category_level_1': item.get('Nível 1'),
+        'category_level_2': item.get('Nível 2'),
+        'category_level_3': item.get('Nível 3')
     }
-    for old, new in replacements.items():
-        name = name.replace(old, new)
-    
-    # Remover conteúdo entre parênteses
-    name = re.sub(r'\([^)]*\)', '', name)
-    
-    # Remover pontuação
-    name = re.sub(r'[,/:;]', ' ', name)
-    
-    # Remover espaços múltiplos
-    name = re.sub(r'\s+', ' ', name)
-    
-    return name.strip()
 
 
-def extract_food_names():
+def extract_food_names(delta=False):
     """
     Extrai todos os nomes de alimentos da tabela portuguesa.
+    Com delta=True, processa apenas as linhas do delta da etapa 01.
     """
-    print("Carregando tabela alimentar portuguesa...")
-    
-    with open(os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json'), 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"✓ Total de alimentos: {len(data)}")
-    
-    # Extrair informações de cada alimento
-    foods_list = []
-    
-    for item in data:
-        food_name = item.get('Nome do alimento', '')
-        if food_name:
-            # Separar por vírgula se houver variações
-            # Ex: "Abacate, Hass" -> ["Abacate", "Hass"]
-            name_parts = [part.strip() for part in food_name.split(',')]
-            main_name = name_parts[0]
-            variation = name_parts[1] if len(name_parts) > 1 else None
-            
-            foods_list.append({
-                'code': item.get('Cod'),
-                'original_name': food_name,
-                'main_name': main_name,
-                'variation': variation,
-                'normalized_name': normalize_name(food_name),
-                'normalized_main': normalize_name(main_name),
-                'category_level_1': item.get('Nível 1'),
-                'category_level_2': item.get('Nível 2'),
-                'category_level_3': item.get('Nível 3')
-            })
+    if delta:
+        table_delta = load_delta()
+        with open(os.path.join(RAW_DATA_DIR, 'portuguese_food_names.json'), 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        
+        print(f"Delta: {table_delta['metadata']['added']} adicionados, "
+              f"{table_delta['metadata']['changed']} alterados, {table_delta['metadata']['removed']} removidos")
+        
+        foods_list = apply_delta(previous['foods'], table_delta, build_food_entry)
+    else:
+        print("Carregando tabela alimentar portuguesa...")
+        
+        with open(os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        print(f"✓ Total de alimentos: {len(data)}")
+        
+        # Extrair informações de cada alimento
+        foods_list = []
+        
+        for item in data:
+            entry = build_food_entry(item)
+            if entry:
+                foods_list.append(entry)
     
     # Salvar lista de nomes
     output = {
@@ -132,4 +126,9 @@ def extract_food_names():
 
 
 if __name__ == "__main__":
-    extract_food_names()
+    parser = argparse.ArgumentParser(description='Extrai os nomes da tabela portuguesa.')
+    parser.add_argument('--delta', action='store_true',
+                        help='Processar apenas as linhas do delta da etapa 01')
+    args = parser.parse_args()
+    
+    extract_food_names(delta=args.delta)
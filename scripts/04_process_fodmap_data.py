@@ -1,12 +1,134 @@
-import json
-import re
 import os
+import re
+
+from fodmap_lists import (compile_line_classifier, iter_category_items, iter_content_lines, split_portion,
+                          LINE_ITEM, PORTION_PATTERN)
+from portions import parse_portion, GRAMS_PER_UNIT
+from fodmap_database import assign_ids, group_indices, save_fodmap_database, FODMAP_DATABASE_PT_FILE
 
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 
+# Categorias principais das listas high/low
+MAIN_CATEGORIES = [
+    'Vegetables and Legumes',
+    'Fruit',
+    'Meats, Poultry and Meat Substitutes',
+    'Fish and Seafood',
+    'Cereals, Grains, Breads, Biscuits/Cookies, Pasta, Nuts and Cakes',
+    'Cereals, Grains, Breads, Biscuits, Pasta, Nuts and Cakes',
+    'Condiments, Dips, Sweets, Sweeteners and Spreads',
+    'Prebiotic Foods',
+    'Drinks and Protein Powders',
+    'Dairy Foods',
+    'Dairy Foods and Eggs',
+    'Cooking ingredients'
+]
+
+# Linhas informativas a ignorar
+SKIP_PATTERNS = [
+    'Want a more printer',
+    'Go to the printable',
+    'FODZYME helps',
+    'Includes garlic',
+    'Includes onion',
+    'The follow',
+    'be sure to check',
+    'ensuring nothing else',
+    'check ingredients',
+    'sometimes has garlic',
+    'see recipe page',
+    'great onion substitute'
+]
+
+# Categorias da lista free (a linha tem de ser exatamente o nome)
+FREE_CATEGORIES = ['Vegetables', 'Fruits', 'Meat and Fish', 'Other Foods']
+
+classify_fodmap_line = compile_line_classifier(MAIN_CATEGORIES, SKIP_PATTERNS)
+classify_free_line = compile_line_classifier(FREE_CATEGORIES, exact_categories=True)
+
+# Tradução das três listas para português de Portugal, num só ficheiro com
+# um marcador antes de cada lista
+PT_LISTS_FILE = os.path.join(RAW_DATA_DIR, 'foodmap_pt.txt')
+PT_FILE_MARKER = re.compile(r'--- INÍCIO DO FICHEIRO (\S+) ---')
+
+# Categorias da tradução (a linha tem de ser o nome, com ou sem ' - nota')
+PT_CATEGORIES = [
+    'Vegetais e Leguminosas',
+    'Fruta',
+    'Carnes, Aves e Substitutos de Carne',
+    'Peixe e Marisco',
+    'Cereais, Grãos, Pães, Bolachas/Biscoitos, Massa, Frutos Secos e Bolos',
+    'Cereais, Grãos, Pães, Bolachas, Massa, Frutos Secos e Bolos',
+    'Condimentos, Molhos, Doces, Adoçantes e Cremes de barrar',
+    'Alimentos Prebióticos',
+    'Bebidas e Proteínas em Pó',
+    'Laticínios',
+    'Laticínios e Ovos',
+    'Ingredientes de culinária',
+    'Ingredientes de Culinária, Ervas e Especiarias',
+    'Vegetais',
+    'Frutas',
+    'Carne e Peixe',
+    'Outros Alimentos'
+]
+
+# Restos da interface de onde a tradução foi copiada
+PASTE_ARTEFACTS = frozenset(['code', 'Code', 'download', 'content_copy', 'expand_less'])
+
+# Segunda parte de "Nome, porção" que parece uma porção, na tradução
+PT_PORTION_PATTERN = re.compile(
+    r'\d|chávena|colher|fatia|copo|saqueta|folha|vage|quadrado|pedaço|até|mais de|menos de', re.IGNORECASE
+)
+
+classify_pt_line = compile_line_classifier(PT_CATEGORIES, exact_categories=True, category_notes=True)
+
+
+def build_fodmap_item(category, line, fodmap_level, portion_pattern=PORTION_PATTERN):
+    """
+    Registo de um item das listas high/low, ou None se o item for ignorado.
+    """
+    # Extrair nome do alimento e observações ("Nome - notas" ou "Nome, porção")
+    food_name, portion, notes = split_portion(line, portion_pattern)
+    
+    # Pular se for muito curto ou for uma subcategoria
+    if len(food_name) < 3 or food_name.endswith(':'):
+        return None
+    
+    return {
+        'name': food_name,
+        'category': category,
+        'fodmap_level': fodmap_level,
+        'portion_note': portion,
+        'additional_notes': notes
+    }
+
+
+def build_free_item(category, line):
+    """Registo de um item da lista free, ou None se o item for ignorado."""
+    food_name = line
+    notes = None
+    
+    # Verificar se há notas entre hífens
+    if ' - ' in line:
+        parts = line.split(' - ', 1)
+        food_name = parts[0].strip()
+        notes = parts[1].strip()
+    
+    if len(food_name) < 3:
+        return None
+    
+    return {
+        'name': food_name,
+        'category': category,
+        'fodmap_level': 'free',
+        'portion_note': None,
+        'additional_notes': notes
+    }
+
+
 def parse_fodmap_file(file_path, fodmap_level):
     """
     Parse o arquivo FODMAP e estrutura os dados.
@@ -18,191 +140,155 @@ def parse_fodmap_file(file_path, fodmap_level):
     Returns:
         Lista de dicionários com alimentos e suas informações FODMAP
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
     foods = []
-    current_category = None
-    
-    # Dividir por linhas
-    lines = content.split('\n')
-    
-    # Categorias principais esperadas
-    main_categories = [
-        'Vegetables and Legumes',
-        'Fruit',
-        'Meats, Poultry and Meat Substitutes',
-        'Fish and Seafood',
-        'Cereals, Grains, Breads, Biscuits/Cookies, Pasta, Nuts and Cakes',
-        'Cereals, Grains, Breads, Biscuits, Pasta, Nuts and Cakes',
-        'Condiments, Dips, Sweets, Sweeteners and Spreads',
-        'Prebiotic Foods',
-        'Drinks and Protein Powders',
-        'Dairy Foods',
-        'Dairy Foods and Eggs',
-        'Cooking ingredients'
-    ]
     
-    for line in lines:
-        original_line = line
-        line = line.strip()
-        
-        # Pular linhas vazias
-        if not line:
-            continue
-        
-        # Detectar categorias principais
-        is_category = False
-        for cat in main_categories:
-            if cat in line:
-                current_category = cat
-                is_category = True
-                break
-        
-        if is_category:
-            continue
-        
-        # Pular linhas informativas
-        skip_patterns = [
-            'Want a more printer',
-            'Go to the printable',
-            'FODZYME helps',
-            'Includes garlic',
-            'Includes onion',
-            'The follow',
-            'be sure to check',
-            'ensuring nothing else',
-            'check ingredients',
-            'sometimes has garlic',
-            'see recipe page',
-            'great onion substitute'
-        ]
-        
-        if any(pattern in line for pattern in skip_patterns):
-            continue
-        
-        # Detectar itens (começam com 4+ espaços na linha original)
-        if current_category and original_line.startswith('    ') and line:
-            # Extrair nome do alimento e observações
-            food_name = line
-            notes = None
-            portion = None
-            
-            # Verificar se há observações com hífen
-            if ' - ' in line:
-                parts = line.split(' - ', 1)
-                food_name = parts[0].strip()
-                notes = parts[1].strip()
-                portion = notes
-            
-            # Verificar se há observações com vírgula seguida de porção
-            elif ',' in line:
-                # Padrão: "Food name, portion info"
-                match = re.match(r'(.+?),\s+(.+)', line)
-                if match:
-                    potential_name = match.group(1).strip()
-                    potential_portion = match.group(2).strip()
-                    # Verificar se a segunda parte parece uma porção
-                    if re.search(r'\d|cup|tbsp|tsp|slice|pod|glass|up to|over|less than', potential_portion, re.IGNORECASE):
-                        food_name = potential_name
-                        portion = potential_portion
-                        notes = potential_portion
-            
-            # Limpar o nome do alimento
-            food_name = food_name.strip()
-            
-            # Pular se for muito curto ou for uma subcategoria
-            if len(food_name) < 3 or food_name.endswith(':'):
-                continue
-            
-            # Adicionar à lista
-            foods.append({
-                'name': food_name,
-                'category': current_category,
-                'fodmap_level': fodmap_level,
-                'portion_note': portion,
-                'additional_notes': notes
-            })
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for category, line in iter_category_items(f, classify_fodmap_line):
+            food = build_fodmap_item(category, line, fodmap_level)
+            if food:
+                foods.append(food)
     
     return foods
 
 
-def normalize_food_name(name):
+def parse_free_fodmap_file(file_path):
     """
-    Normaliza o nome do alimento para facilitar matching.
-    Remove variações, parênteses, e padroniza o texto.
+    Parse o arquivo FREE FODMAP (alimentos completamente seguros).
     """
-    # Converter para minúsculas
-    name = name.lower()
-    
-    # Remover conteúdo entre parênteses
-    name = re.sub(r'\([^)]*\)', '', name)
+    foods = []
     
-    # Remover pontuação extra
-    name = re.sub(r'[/:,]', ' ', name)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for category, line in iter_category_items(f, classify_free_line):
+            food = build_free_item(category, line)
+            if food:
+                foods.append(food)
     
-    # Remover espaços múltiplos
-    name = re.sub(r'\s+', ' ', name)
+    return foods
+
+
+def split_translated_lists(file_path):
+    """Linhas de cada lista traduzida: nome do ficheiro original -> linhas."""
+    sections = {}
+    current = None
     
-    # Remover espaços no início e fim
-    name = name.strip()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for raw_line in f:
+            match = PT_FILE_MARKER.fullmatch(raw_line.strip())
+            if match:
+                current = sections.setdefault(match.group(1), [])
+            elif current is not None:
+                current.append(raw_line)
     
-    return name
+    return sections
 
 
-def parse_free_fodmap_file(file_path):
+def align_translated_list(file_path, translated_lines, classify, build_item):
     """
-    Parse o arquivo FREE FODMAP (alimentos completamente seguros).
+    Alinha uma lista FODMAP com a sua tradução, linha a linha.
+    
+    As duas listas dão a mesma sequência de linhas com conteúdo
+    (iter_content_lines), por isso cada item que gera um registo na lista
+    original corresponde à linha na mesma posição da tradução.
+    
+    Args:
+        file_path: Lista original (inglês)
+        translated_lines: Linhas da tradução
+        classify: Classificador de linhas da lista original
+        build_item: build_item(categoria, linha) -> registo ou None, o mesmo
+            usado para a lista original
+    
+    Returns:
+        Lista (categoria, linha) da tradução para cada registo da lista
+        original, pela mesma ordem, ou None se as listas não tiverem o mesmo
+        número de linhas
     """
     with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+        original = list(iter_content_lines(f, classify))
+    translated = list(iter_content_lines(translated_lines, classify_pt_line, PASTE_ARTEFACTS))
     
-    foods = []
-    current_category = None
+    if len(original) != len(translated):
+        print(f"⚠ {os.path.basename(file_path)}: {len(original)} linhas no original, "
+              f"{len(translated)} na tradução; lista não alinhada")
+        return None
     
-    lines = content.split('\n')
+    return [
+        (translated_category, translated_line)
+        for (kind, category, line), (_, translated_category, translated_line) in zip(original, translated)
+        if kind == LINE_ITEM and build_item(category, line)
+    ]
+
+
+def create_portuguese_fodmap_database(all_foods):
+    """
+    Cria output/fodmap_database_pt.json a partir de raw-data/foodmap_pt.txt.
     
-    main_categories = ['Vegetables', 'Fruits', 'Meat and Fish', 'Other Foods']
+    Cada alimento traduzido fica ligado ao registo em inglês pela posição
+    em fodmap_database.json ('english_index') e tem o mesmo 'id', para a
+    etapa 05 procurar o nome português diretamente na tabela portuguesa.
     
-    for line in lines:
-        original_line = line
-        line = line.strip()
-        
-        if not line:
-            continue
-        
-        # Detectar categorias
-        is_category = False
-        for cat in main_categories:
-            if cat == line:
-                current_category = cat
-                is_category = True
-                break
-        
-        if is_category:
+    Args:
+        all_foods: Registos de fodmap_database.json (high, low e free)
+    """
+    if not os.path.exists(PT_LISTS_FILE):
+        print(f"⚠ {os.path.relpath(PT_LISTS_FILE, BASE_DIR)} não existe; fodmap_database_pt.json não foi criado")
+        return None
+    
+    sections = split_translated_lists(PT_LISTS_FILE)
+    lists = [
+        ('high_fodmap.txt', 'high', classify_fodmap_line,
+         lambda category, line: build_fodmap_item(category, line, 'high')),
+        ('low_fodmap.txt', 'low', classify_fodmap_line,
+         lambda category, line: build_fodmap_item(category, line, 'low')),
+        ('free_fodmap.txt', 'free', classify_free_line, build_free_item),
+    ]
+    
+    foods = []
+    for file_name, level, classify, build_item in lists:
+        english = [index for index, food in enumerate(all_foods) if food['fodmap_level'] == level]
+        aligned = None
+        if file_name in sections:
+            aligned = align_translated_list(os.path.join(RAW_DATA_DIR, file_name), sections[file_name],
+                                            classify, build_item)
+        if aligned is None or len(aligned) != len(english):
             continue
         
-        # Detectar itens (começam com espaços na linha original)
-        if current_category and original_line.startswith('    ') and line:
-            food_name = line
-            notes = None
-            
-            # Verificar se há notas entre hífens
-            if ' - ' in line:
-                parts = line.split(' - ', 1)
-                food_name = parts[0].strip()
-                notes = parts[1].strip()
-            
-            if len(food_name) >= 3:
-                foods.append({
-                    'name': food_name,
-                    'category': current_category,
-                    'fodmap_level': 'free',
-                    'portion_note': None,
-                    'additional_notes': notes
-                })
+        for english_index, (category, line) in zip(english, aligned):
+            if level == 'free':
+                food = build_free_item(category, line)
+            else:
+                food = build_fodmap_item(category, line, level, PT_PORTION_PATTERN)
+            if food is None:
+                continue
+            food = {'id': all_foods[english_index]['id'], **food}
+            food['english_index'] = english_index
+            food['english_name'] = all_foods[english_index]['name']
+            foods.append(food)
     
-    return foods
+    by_category = group_indices(foods, 'category')
+    by_level = group_indices(foods, 'fodmap_level', keys=('high', 'low', 'free'))
+    
+    output = {
+        'metadata': {
+            'language': 'pt-PT',
+            'source': os.path.basename(PT_LISTS_FILE),
+            'total_foods': len(foods),
+            'high_fodmap_count': len(by_level['high']),
+            'low_fodmap_count': len(by_level['low']),
+            'free_fodmap_count': len(by_level['free']),
+            'english_foods': len(all_foods),
+            'categories': list(by_category.keys())
+        },
+        'foods': foods,
+        'by_category': by_category,
+        'by_level': by_level
+    }
+    
+    save_fodmap_database(output, FODMAP_DATABASE_PT_FILE)
+    
+    print(f"✓ Tradução pt-PT: {len(foods)} de {len(all_foods)} alimentos alinhados")
+    print(f"✓ Arquivo: output/fodmap_database_pt.json")
+    
+    return output
 
 
 def create_fodmap_database():
@@ -220,27 +306,19 @@ def create_fodmap_database():
     print(f"✓ Low FODMAP: {len(low_fodmap)} alimentos")
     print(f"✓ Free FODMAP: {len(free_fodmap)} alimentos")
     
-    # Combinar todos os alimentos
-    all_foods = high_fodmap + low_fodmap + free_fodmap
+    # Combinar todos os alimentos, cada um com um ID inteiro estável (ver
+    # fodmap_database.fodmap_id), que as etapas seguintes usam para o identificar
+    all_foods = assign_ids(high_fodmap + low_fodmap + free_fodmap)
     
-    # Adicionar nomes normalizados para matching
+    # Adicionar porções numéricas (o nome normalizado não é guardado:
+    # load_fodmap_database recalcula-o)
     for food in all_foods:
-        food['normalized_name'] = normalize_food_name(food['name'])
+        food['portion'] = parse_portion(food['portion_note'], food['fodmap_level'])
     
-    # Criar estrutura organizada por categoria
-    by_category = {}
-    for food in all_foods:
-        category = food['category']
-        if category not in by_category:
-            by_category[category] = []
-        by_category[category].append(food)
-    
-    # Criar estrutura por nível FODMAP
-    by_level = {
-        'high': high_fodmap,
-        'low': low_fodmap,
-        'free': free_fodmap
-    }
+    # Vistas agrupadas por categoria e por nível FODMAP: guardam apenas as
+    # posições em 'foods', para cada registo ser escrito uma única vez
+    by_category = group_indices(all_foods, 'category')
+    by_level = group_indices(all_foods, 'fodmap_level', keys=('high', 'low', 'free'))
     
     # Salvar estrutura completa
     output = {
@@ -249,18 +327,20 @@ def create_fodmap_database():
             'high_fodmap_count': len(high_fodmap),
             'low_fodmap_count': len(low_fodmap),
             'free_fodmap_count': len(free_fodmap),
-            'categories': list(by_category.keys())
+            'categories': list(by_category.keys()),
+            'portion_grams_per_unit': GRAMS_PER_UNIT
         },
         'foods': all_foods,
         'by_category': by_category,
         'by_level': by_level
     }
     
-    with open(os.path.join(OUTPUT_DIR, 'fodmap_database.json'), 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    save_fodmap_database(output)
     
     print(f"\n✓ Banco de dados FODMAP criado!")
     print(f"✓ Arquivo: output/fodmap_database.json")
+    
+    create_portuguese_fodmap_database(all_foods)
     print(f"\nCategorias encontradas:")
     for category in by_category.keys():
         count = len(by_category[category])
@@ -1,8 +1,24 @@
+import argparse
+import heapq
+import inspect
 import json
-import re
 import os
+import time
+from itertools import count
+from multiprocessing import Pool
 from difflib import SequenceMatcher
 
+from table_delta import load_delta, touched_codes, updated_rows
+from text_normalization import english_singular, normalize_name, name_key
+from fodmap_database import load_fodmap_database, FODMAP_DATABASE_PT_FILE
+from ngram_index import build_ngram_index, similar_candidates, containment_candidates
+from phrase_matcher import compile_phrase_trie, find_phrases
+from tfidf_index import build_tfidf_scorer
+from category_crosswalk import compatible_categories
+from build_cache import code_dependencies, hash_file
+from match_cache import (fingerprint, index_dictionary_entries, dictionary_fingerprint,
+                         load_match_cache, save_match_cache)
+
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
@@ -220,7 +236,7 @@ TRANSLATION_DICT = {
     'venison': 'veado',
     'wild boar': 'javali',
     'sausage': 'salsicha',
-    'chorizo': 'chouriço',
+    'chorizo': 'chouriço de carne',
     'ham': 'fiambre',
     'bacon': 'bacon',
     'prosciutto': 'presunto',
@@ -299,10 +315,10 @@ TRANSLATION_DICT = {
     'semi-skimmed': 'leite meio-gordo',
     'buttermilk': 'leitelho',
     'lactose free': 'sem lactose',
-    'almond milk': 'bebida de amêndoa',
-    'soy milk': 'bebida de soja',
-    'oat milk': 'bebida de aveia',
-    'rice milk': 'bebida de arroz',
+    'almond milk': 'bebida vegetal à base de amêndoa',
+    'soy milk': 'bebida vegetal à base de soja',
+    'oat milk': 'bebida vegetal à base de aveia',
+    'rice milk': 'bebida vegetal à base de arroz',
     'coconut milk': 'leite de coco',
     'cheese': 'queijo',
     'yogurt': 'iogurte',
@@ -315,10 +331,12 @@ TRANSLATION_DICT = {
     'whipped cream': 'chantilly',
     'sour cream': 'nata azeda',
     'creme fraiche': 'nata',
-    'ice cream': 'gelado',
+    'ice cream': 'gelado de leite',
     'gelato': 'gelado',
     'sorbet': 'sorvete',
-    'ricotta': 'ricota',
+    # A tabela não tem ricota; o queijo equivalente é o requeijão
+    'ricotta': 'requeijão',
+    'cheese ricotta': 'requeijão',
     'mozzarella': 'mozzarella',
     'cheddar': 'cheddar',
     'parmesan': 'parmesão',
@@ -370,6 +388,8 @@ TRANSLATION_DICT = {
     'scone': 'scone',
     'crumpet': 'crumpet',
     'pasta': 'massa',
+    # Massa de trigo simples, sem ovo
+    'pasta wheat': 'massa miúda',
     'spaghetti': 'esparguete',
     'macaroni': 'macarrão',
     'penne': 'penne',
@@ -494,7 +514,6 @@ TRANSLATION_DICT = {
     'stevia': 'stevia',
     'salt': 'sal',
     'sea salt': 'sal marinho',
-    'pepper': 'pimenta',
     'black pepper': 'pimenta preta',
     'white pepper': 'pimenta branca',
     'cayenne': 'pimenta caiena',
@@ -533,7 +552,7 @@ TRANSLATION_DICT = {
     'dijon': 'dijon',
     'ketchup': 'ketchup',
     'tomato sauce': 'molho de tomate',
-    'tomato paste': 'concentrado de tomate',
+    'tomato paste': 'tomate concentrado',
     'mayonnaise': 'maionese',
     'mayo': 'maionese',
     'pesto': 'pesto',
@@ -605,31 +624,32 @@ TRANSLATION_DICT = {
     'bicarbonate': 'bicarbonato',
 }
 
+# Candidatos guardados por alimento FODMAP e margem (score do 1.º - score do
+# 2.º) abaixo da qual o match vai para o ficheiro de revisão
+TOP_K = 5
+REVIEW_MARGIN = 0.05
 
-def normalize_name(name):
-    """Normaliza nome para matching."""
-    if not name:
-        return ""
-    name = name.lower()
-    # Remover acentos
-    replacements = {
-        'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-        'é': 'e', 'ê': 'e', 'è': 'e',
-        'í': 'i', 'ì': 'i',
-        'ó': 'o', 'ô': 'o', 'õ': 'o', 'ò': 'o',
-        'ú': 'u', 'ü': 'u', 'ù': 'u',
-        'ç': 'c'
-    }
-    for old, new in replacements.items():
-        name = name.replace(old, new)
-    
-    # Remover parênteses e conteúdo
-    name = re.sub(r'\([^)]*\)', '', name)
-    # Remover pontuação
-    name = re.sub(r'[,/:;.\-]', ' ', name)
-    # Remover espaços múltiplos
-    name = re.sub(r'\s+', ' ', name)
-    return name.strip()
+# Score mínimo do match direto pelo nome pt-PT (ver portuguese_candidates);
+# vai até 1.0 quando os nomes são iguais
+PORTUGUESE_PREFIX_SCORE = 0.9
+
+# Score das alternativas e do nome principal do nome pt-PT: de
+# PORTUGUESE_FALLBACK_SCORE a PORTUGUESE_FALLBACK_MAX, abaixo dos candidatos
+# do dicionário e da similaridade direta, mas acima do limiar de aceitação
+PORTUGUESE_FALLBACK_SCORE = 0.75
+PORTUGUESE_FALLBACK_MAX = 0.8
+
+# Backends de similaridade disponíveis (ver build_matcher)
+SIMILARITY_BACKENDS = ('sequence', 'tfidf')
+
+# Modo --trace: ficheiro NDJSON com um registo por alimento FODMAP e número
+# de alimentos mais lentos mostrados no resumo
+TRACE_FILE = os.path.join(OUTPUT_DIR, 'fodmap_matching_trace.ndjson')
+TRACE_SLOWEST = 10
+
+# Trie de expressões do dicionário ('sweet potato' ganha a 'potato'), com as
+# palavras no singular ('brussels sprouts' casa com 'brussels sprout')
+TRANSLATION_TRIE = compile_phrase_trie(TRANSLATION_DICT, fold=english_singular)
 
 
 def similarity(a, b):
@@ -637,13 +657,778 @@ def similarity(a, b):
     return SequenceMatcher(None, a, b).ratio()
 
 
-def find_matches():
-    """Encontra equivalências entre FODMAP e tabela portuguesa."""
+def fodmap_translations(fodmap_normalized):
+    """
+    Traduções (normalizadas) das expressões do dicionário presentes no nome
+    FODMAP, numa só passagem (ocorrência mais longa: 'sweet potato' em vez
+    de 'potato').
+    """
+    return [normalize_name(translation) for _, _, translation in
+            find_phrases(TRANSLATION_TRIE, fodmap_normalized.split())]
+
+
+def build_pt_index(pt_foods):
+    """Índice de trigramas sobre o nome principal normalizado."""
+    return build_ngram_index(pt_food['normalized_main'] for pt_food in pt_foods)
+
+
+def build_name_lookup(pt_foods):
+    """
+    Índice dos nomes portugueses por chave (name_key do nome completo):
+    'keys' tem a chave de cada posição e 'prefix' liga cada início de chave
+    às posições.
+    """
+    keys = [name_key(pt_food['normalized_name']) for pt_food in pt_foods]
+    by_prefix = {}
+    for position, key in enumerate(keys):
+        for end in range(1, len(key) + 1):
+            by_prefix.setdefault(key[:end], []).append(position)
+    return {'keys': keys, 'prefix': by_prefix}
+
+
+def portuguese_queries(name_pt):
+    """
+    Chaves a procurar para o nome pt-PT de um alimento FODMAP, pela ordem:
+    o nome completo, cada alternativa 'a / b' com o resto do nome ('Doce /
+    geleia, framboesa' -> 'doce framboesa', 'geleia framboesa') e o nome
+    antes da primeira vírgula.
+    """
+    main, _, rest = name_pt.partition(',')
+    alternatives = main.split('/') if '/' in main else []
+    variants = [name_pt] + [f'{alternative} {rest}' for alternative in alternatives] + [main]
+    keys = dict.fromkeys(name_key(normalize_name(variant)) for variant in variants)
+    return [key for key in keys if key]
+
+
+def portuguese_candidates(name_pt, names, allowed=None, fallbacks=True):
+    """
+    Match direto pelo nome pt-PT, sem similaridade: os alimentos portugueses
+    cuja chave começa pela primeira chave de portuguese_queries() que tem
+    resultados ('alho' -> 'Alho cru', 'pao trigo' -> 'Pão de trigo').
+    
+    Pelo nome completo, o tipo é 'portuguese_exact' se as chaves forem iguais
+    e 'portuguese' se não; o score vai de PORTUGUESE_PREFIX_SCORE a 1.0 pela
+    fração da chave portuguesa coberta, para 'Ameixa branca' ganhar a
+    'Ameixa, conserva em calda de açúcar'.
+    
+    Pelas alternativas ou pelo nome principal ('queijo' para 'Queijo,
+    ricota') o tipo é 'portuguese_partial', com score entre
+    PORTUGUESE_FALLBACK_SCORE e PORTUGUESE_FALLBACK_MAX. Com fallbacks=False
+    só se procura o nome completo.
+    
+    Returns:
+        Lista de (posição, score, tipo), pela ordem da tabela
+    """
+    keys = names['keys']
+    full_query = name_key(normalize_name(name_pt))
+    queries = portuguese_queries(name_pt)
+    if not fallbacks:
+        queries = [query for query in queries if query == full_query]
+    for query in queries:
+        positions = [position for position in names['prefix'].get(query, ())
+                     if allowed is None or position in allowed]
+        if not positions:
+            continue
+        if query == full_query:
+            return [
+                (position,
+                 PORTUGUESE_PREFIX_SCORE + (1 - PORTUGUESE_PREFIX_SCORE) * len(query) / len(keys[position]),
+                 'portuguese_exact' if len(query) == len(keys[position]) else 'portuguese')
+                for position in positions
+            ]
+        return [
+            (position,
+             PORTUGUESE_FALLBACK_SCORE
+             + (PORTUGUESE_FALLBACK_MAX - PORTUGUESE_FALLBACK_SCORE) * len(query) / len(keys[position]),
+             'portuguese_partial')
+            for position in positions
+        ]
+    return []
+
+
+def sequence_scorer(pt_index):
+    """
+    score(query, threshold, allowed=None, trace=None) -> {posição: similarity}
+    com SequenceMatcher, calculado só sobre os candidatos do índice de
+    trigramas (e entre as posições allowed, se indicadas). Os restantes não
+    podem passar o limiar, por isso o resultado é o mesmo de percorrer a
+    tabela inteira. Com uma lista trace, junta-lhe um registo da avaliação
+    (ver rank_candidates).
+    """
+    texts = pt_index['texts']
+    
+    def score(query, threshold, allowed=None, trace=None):
+        stats = {} if trace is not None else None
+        positions = similar_candidates(pt_index, query, threshold, allowed, stats)
+        scores = {}
+        for position in positions:
+            sim = similarity(query, texts[position])
+            if sim > threshold:
+                scores[position] = sim
+        if trace is not None:
+            trace.append({
+                'query': query,
+                'threshold': threshold,
+                'candidates': stats['blocked'],
+                'evaluations': len(positions),
+                'passed': len(scores),
+            })
+        return scores
+    
+    return score
+
+
+def build_matcher(pt_foods, fodmap_foods=(), backend='sequence', idf_foods=None, crosswalk=True):
+    """
+    Prepara o matching contra pt_foods.
+    
+    Args:
+        pt_foods: Alimentos portugueses candidatos
+        fodmap_foods: Alimentos FODMAP a procurar (usados pelo backend
+            'tfidf' para vetorizar todas as consultas de uma vez)
+        backend: 'sequence' (SequenceMatcher) ou 'tfidf' (cosseno TF-IDF
+            de trigramas de caracteres)
+        idf_foods: Tabela usada para o IDF do backend 'tfidf' (por omissão,
+            pt_foods)
+        crosswalk: Guardar, por categoria FODMAP, as posições de pt_foods
+            nas categorias INSA compatíveis (category_crosswalk.py) e as
+            restantes
+    """
+    pt_index = build_pt_index(pt_foods)
+    
+    if backend == 'tfidf':
+        queries = []
+        for fodmap_food in fodmap_foods:
+            queries.append(fodmap_food['normalized_name'])
+            queries.extend(fodmap_translations(fodmap_food['normalized_name']))
+        idf_texts = None
+        if idf_foods is not None:
+            idf_texts = [pt_food['normalized_main'] for pt_food in idf_foods]
+        score = build_tfidf_scorer(pt_index['texts'], queries, idf_texts=idf_texts)
+    else:
+        score = sequence_scorer(pt_index)
+    
+    # Categoria FODMAP -> (posições compatíveis, restantes posições); os mesmos
+    # frozensets são partilhados pelas categorias que levam às mesmas
+    # categorias INSA
+    partitions = {}
+    if crosswalk:
+        all_positions = frozenset(range(len(pt_foods)))
+        by_categories = {}
+        for fodmap_category in sorted({fodmap_food['category'] for fodmap_food in fodmap_foods}):
+            categories = compatible_categories(fodmap_category)
+            if categories is None:
+                continue
+            if categories not in by_categories:
+                allowed = frozenset(
+                    position for position, pt_food in enumerate(pt_foods)
+                    if pt_food['category_level_1'] in categories
+                )
+                by_categories[categories] = (allowed, all_positions - allowed)
+            if by_categories[categories][0]:
+                partitions[fodmap_category] = by_categories[categories]
+    
+    return {'foods': pt_foods, 'index': pt_index, 'names': build_name_lookup(pt_foods),
+            'score': score, 'partitions': partitions}
+
+
+def rank_candidates(fodmap_food, matcher, top_k=TOP_K, allowed=None, trace=None, fallbacks=True):
+    """
+    Ordena os melhores alimentos portugueses para um alimento FODMAP.
+    
+    Args:
+        fodmap_food: Alimento FODMAP
+        matcher: Criado por build_matcher()
+        top_k: Número máximo de candidatos devolvidos
+        allowed: Posições de matcher['foods'] a considerar (por omissão, todas)
+        fallbacks: Aceitar os matches 'portuguese_partial' (ver
+            portuguese_candidates)
+        trace: Se indicada, lista onde se junta um registo desta passagem:
+            posições consideradas, candidatos pelo nome pt-PT, candidatos
+            por contenção de cada tradução,
+            e, por cada cálculo de similaridade, candidatos do índice
+            ('candidates'), similaridades calculadas ('evaluations') e
+            quantas passaram o limiar ('passed')
+    
+    Returns:
+        Lista de (pt_food, score, match_type), do melhor para o pior, só com
+        candidatos que passam os limiares. Em caso de empate fica à frente o
+        candidato encontrado primeiro, por isso o primeiro é o match escolhido.
+    """
+    pt_foods = matcher['foods']
+    pt_index = matcher['index']
+    score = matcher['score']
+    
+    fodmap_normalized = fodmap_food['normalized_name']
+    
+    evaluations = None
+    if trace is not None:
+        containment_sizes = []
+        evaluations = []
+    
+    # posição -> (score, ordem em que atingiu esse score, tipo)
+    found = {}
+    order = count()
+    
+    def add(position, candidate_score, candidate_type):
+        previous = found.get(position)
+        if previous is None or candidate_score > previous[0]:
+            found[position] = (candidate_score, next(order), candidate_type)
+    
+    # Match direto pelo nome pt-PT; se o nome completo tiver resultados, o
+    # dicionário e a similaridade já não são precisos. Os matches pelas
+    # alternativas e pelo nome principal só entram no fim, com score abaixo
+    # dos restantes
+    portuguese = []
+    if fodmap_food.get('name_pt'):
+        portuguese = portuguese_candidates(fodmap_food['name_pt'], matcher['names'], allowed, fallbacks)
+    partial = [candidate for candidate in portuguese if candidate[2] == 'portuguese_partial']
+    full = [candidate for candidate in portuguese if candidate[2] != 'portuguese_partial']
+    
+    # Com vários matches pelo nome completo, se alguns contiverem uma tradução
+    # do dicionário ficam só esses ('Gelado' dá 'Gelado de leite' e não
+    # 'Gelado de água' para 'Ice cream')
+    if len(full) > 1:
+        confirmed = set()
+        positions = frozenset(position for position, _, _ in full)
+        for translation_normalized in fodmap_translations(fodmap_normalized):
+            confirmed.update(containment_candidates(pt_index, translation_normalized, positions))
+        if confirmed:
+            full = [candidate for candidate in full if candidate[0] in confirmed]
+    for position, candidate_score, candidate_type in full:
+        add(position, candidate_score, candidate_type)
+    
+    # Tentar matching via dicionário de traduções
+    translations = [] if found else fodmap_translations(fodmap_normalized)
+    for translation_normalized in translations:
+        # Match exato com tradução (contém ou está contido nela)
+        candidates = {
+            position: (1.0, 'dictionary')
+            for position in containment_candidates(pt_index, translation_normalized, allowed)
+        }
+        if trace is not None:
+            containment_sizes.append({'query': translation_normalized, 'candidates': len(candidates)})
+        
+        # Match parcial com tradução
+        if translation_normalized and len(translation_normalized) > 3:
+            for position, sim in score(translation_normalized, 0.85, allowed, evaluations).items():
+                candidates.setdefault(position, (sim, 'dictionary_partial'))
+        
+        # Percorrer pela ordem da tabela (em caso de empate ganha o primeiro)
+        for position in sorted(candidates):
+            add(position, *candidates[position])
+    
+    # Se não encontrou match por dicionário, tentar similaridade direta
+    best_score = max((value[0] for value in found.values()), default=0)
+    if best_score < 0.7:
+        direct = score(fodmap_normalized, 0.8, allowed, evaluations)
+        for position in sorted(direct):
+            add(position, direct[position], 'similarity')
+    
+    for position, candidate_score, candidate_type in partial:
+        add(position, candidate_score, candidate_type)
+    
+    # Os k melhores (heap limitado a top_k)
+    best = heapq.nsmallest(top_k, found.items(), key=lambda item: (-item[1][0], item[1][1]))
+    
+    # Só aceitar matches válidos
+    ranked = [
+        (pt_foods[position], candidate_score, candidate_type)
+        for position, (candidate_score, _, candidate_type) in best
+        if candidate_score > 0.7
+    ]
+    
+    if trace is not None:
+        trace.append({
+            'positions': len(pt_foods) if allowed is None else len(allowed),
+            'portuguese': len(portuguese),
+            'containment': containment_sizes,
+            'similarity': evaluations,
+            'accepted': len(ranked),
+        })
+    
+    return ranked
+
+
+def match_food(fodmap_food, matcher):
+    """
+    Encontra o melhor alimento português para um alimento FODMAP.
+    
+    Returns:
+        Tuplo (pt_food, score, match_type), ou (None, 0, None) se nenhum
+        candidato passar os limiares.
+    """
+    ranked = rank_candidates(fodmap_food, matcher, top_k=1)
+    if ranked:
+        return ranked[0]
+    return None, 0, None
+
+
+def rank_food(fodmap_food, matcher, top_k=TOP_K, trace=None):
+    """
+    rank_candidates() só entre as categorias INSA compatíveis com a categoria
+    FODMAP (matcher['partitions']); se nenhum candidato passar os limiares,
+    contra a tabela completa. Categorias sem correspondência usam logo a
+    tabela completa.
+    
+    No recurso à tabela completa basta procurar nas restantes posições: as
+    compatíveis já foram vistas e nenhuma passou os limiares, por isso o
+    resultado é o mesmo. Nesse recurso não se aceitam matches
+    'portuguese_partial': fora das categorias compatíveis, uma alternativa
+    sozinha leva a alimentos de outro tipo ('pasta' de 'Pasta / concentrado de
+    tomate' -> 'Pasta de fígado de porco (paté)').
+    
+    trace é passada a rank_candidates (um registo por passagem).
+    """
+    partition = matcher['partitions'].get(fodmap_food['category'])
+    if partition is None:
+        return rank_candidates(fodmap_food, matcher, top_k, trace=trace)
+    
+    allowed, rest = partition
+    return (rank_candidates(fodmap_food, matcher, top_k, allowed, trace)
+            or rank_candidates(fodmap_food, matcher, top_k, rest, trace, fallbacks=False))
+
+
+# Matcher de cada processo do pool (criado uma vez por processo em _init_worker)
+_worker_matcher = None
+
+
+_worker_top_k = TOP_K
+
+
+def _init_worker(pt_foods, fodmap_foods, backend, top_k, crosswalk):
+    global _worker_matcher, _worker_top_k
+    _worker_matcher = build_matcher(pt_foods, fodmap_foods, backend, crosswalk=crosswalk)
+    _worker_top_k = top_k
+
+
+def _match_chunk(fodmap_chunk):
+    return [ranked_codes(fodmap_food, _worker_matcher, _worker_top_k)
+            for fodmap_food in fodmap_chunk]
+
+
+def ranked_codes(fodmap_food, matcher, top_k=TOP_K):
+    """rank_food() com os alimentos portugueses substituídos pelo código."""
+    return [(pt_food['code'], score, match_type)
+            for pt_food, score, match_type in rank_food(fodmap_food, matcher, top_k)]
+
+
+def match_entry_or_none(fodmap_food, matcher, top_k=TOP_K):
+    """Entrada de equivalência do alimento FODMAP, ou None se não houver match."""
+    ranked = rank_food(fodmap_food, matcher, top_k)
+    if ranked:
+        return build_match_entry(fodmap_food, ranked)
+    return None
+
+
+def rank_all(fodmap_foods, pt_foods, backend='sequence', workers=1, top_k=TOP_K, query_foods=None,
+             crosswalk=True):
+    """
+    Ordena os candidatos de todos os alimentos FODMAP.
+    
+    Com workers > 1, a lista é dividida em blocos por um pool de processos.
+    A tabela portuguesa e o dicionário são passados uma vez a cada processo
+    (na sua inicialização), não a cada bloco, e os blocos são recolhidos pela
+    ordem original, por isso o resultado é igual ao da execução em série.
+    
+    query_foods são os alimentos FODMAP vetorizados pelo backend 'tfidf' (por
+    omissão, fodmap_foods); o IDF depende deles, por isso quando só se
+    procura um subconjunto devem ser todos.
+    
+    Com crosswalk, cada alimento é procurado primeiro nas categorias INSA
+    compatíveis (ver rank_food).
+    
+    Returns:
+        Lista com os candidatos de cada alimento FODMAP (ranked_codes), pela
+        ordem de fodmap_foods
+    """
+    if query_foods is None:
+        query_foods = fodmap_foods
+    
+    if workers <= 1:
+        matcher = build_matcher(pt_foods, query_foods, backend, crosswalk=crosswalk)
+        return [ranked_codes(fodmap_food, matcher, top_k) for fodmap_food in fodmap_foods]
+    
+    # Alguns blocos por processo, para equilibrar a carga
+    chunk_size = max(1, -(-len(fodmap_foods) // (workers * 4)))
+    chunks = [fodmap_foods[i:i + chunk_size] for i in range(0, len(fodmap_foods), chunk_size)]
+    
+    results = []
+    with Pool(workers, initializer=_init_worker, initargs=(pt_foods, query_foods, backend, top_k, crosswalk)) as pool:
+        for chunk_results in pool.imap(_match_chunk, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+def entries_from_ranked(fodmap_foods, pt_foods, ranked_lists):
+    """Entradas de equivalência (ou None) a partir das listas de ranked_codes."""
+    pt_by_code = {pt_food['code']: pt_food for pt_food in pt_foods}
+    entries = []
+    for fodmap_food, ranked in zip(fodmap_foods, ranked_lists):
+        if ranked:
+            ranked = [(pt_by_code[code], score, match_type) for code, score, match_type in ranked]
+            entries.append(build_match_entry(fodmap_food, ranked))
+        else:
+            entries.append(None)
+    return entries
+
+
+def match_all(fodmap_foods, pt_foods, backend='sequence', workers=1, top_k=TOP_K, crosswalk=True):
+    """
+    Procura o match de todos os alimentos FODMAP (ver rank_all).
+    
+    Returns:
+        Lista com a entrada de cada alimento FODMAP (ou None), pela ordem de
+        fodmap_foods
+    """
+    ranked_lists = rank_all(fodmap_foods, pt_foods, backend, workers, top_k, crosswalk=crosswalk)
+    return entries_from_ranked(fodmap_foods, pt_foods, ranked_lists)
+
+
+def matcher_fingerprint(pt_foods, fodmap_foods, backend, top_k, crosswalk):
+    """
+    Hash de tudo o que afeta os resultados além do nome e do dicionário: a
+    tabela portuguesa, o código do matching (as funções desta etapa e os
+    módulos locais importados, exceto este ficheiro, que contém o dicionário)
+    e os parâmetros. Com 'tfidf', o IDF depende de todas as consultas, por
+    isso entra também o conjunto de nomes FODMAP e traduções.
+    """
+    script_path = os.path.abspath(__file__)
+    code = [hash_file(path) for path in code_dependencies(script_path) if path != script_path]
+    code.extend(inspect.getsource(function) for function in (
+        similarity, fodmap_translations, build_pt_index, build_name_lookup, portuguese_queries,
+        portuguese_candidates, sequence_scorer, build_matcher, rank_candidates, rank_food))
+    
+    corpus = [
+        [pt_food['code'], pt_food['original_name'], pt_food['main_name'],
+         pt_food['normalized_main'], pt_food['category_level_1']]
+        for pt_food in pt_foods
+    ]
+    
+    queries = None
+    if backend == 'tfidf':
+        queries = sorted({
+            query
+            for fodmap_food in fodmap_foods
+            for query in [fodmap_food['normalized_name'],
+                          *fodmap_translations(fodmap_food['normalized_name'])]
+        })
+    
+    return fingerprint({
+        'corpus': fingerprint(corpus),
+        'code': fingerprint(code),
+        'backend': backend,
+        'top_k': top_k,
+        'crosswalk': crosswalk,
+        'portuguese_prefix_score': PORTUGUESE_PREFIX_SCORE,
+        'portuguese_fallback_score': (PORTUGUESE_FALLBACK_SCORE, PORTUGUESE_FALLBACK_MAX),
+        'queries': queries,
+    })
+
+
+def match_all_cached(fodmap_foods, pt_foods, backend='sequence', workers=1, top_k=TOP_K, crosswalk=True):
+    """
+    match_all() com a cache persistente de match_cache.py.
+    
+    A chave de cada alimento FODMAP junta o nome normalizado, a categoria
+    (que decide as categorias INSA do crosswalk), o nome pt-PT, a impressão digital do
+    matcher (matcher_fingerprint) e o hash das entradas do TRANSLATION_DICT
+    cujas palavras estão todas no nome. Só os alimentos sem
+    entrada na cache são procurados; o resultado é igual ao de match_all().
+    """
+    context = matcher_fingerprint(pt_foods, fodmap_foods, backend, top_k, crosswalk)
+    dictionary_index = index_dictionary_entries(TRANSLATION_DICT, fold=english_singular)
+    
+    keys = []
+    for fodmap_food in fodmap_foods:
+        normalized = fodmap_food['normalized_name']
+        keys.append(fingerprint([
+            context, normalized, fodmap_food['category'], fodmap_food.get('name_pt'),
+            dictionary_fingerprint(dictionary_index, [english_singular(token) for token in normalized.split()])
+        ]))
+    
+    cache = load_match_cache()
+    misses = [fodmap_food for fodmap_food, key in zip(fodmap_foods, keys) if key not in cache]
+    print(f"Cache: {len(fodmap_foods) - len(misses)} alimentos reaproveitados, "
+          f"{len(misses)} a calcular")
+    
+    if misses:
+        computed = rank_all(misses, pt_foods, backend, workers, top_k, query_foods=fodmap_foods,
+                            crosswalk=crosswalk)
+        miss_keys = [key for key in keys if key not in cache]
+        cache.update(zip(miss_keys, (list(map(list, ranked)) for ranked in computed)))
+    
+    # Só ficam as chaves desta execução (as antigas já não voltam a servir)
+    used = {key: cache[key] for key in keys}
+    save_match_cache(used)
+    
+    return entries_from_ranked(fodmap_foods, pt_foods, [used[key] for key in keys])
+
+
+def trace_food(fodmap_food, matcher, top_k=TOP_K):
+    """
+    rank_food() instrumentado.
+    
+    Returns:
+        Tuplo (ranked, registo), em que o registo tem as palavras do nome, as
+        chaves procuradas pelo nome pt-PT, as expressões do dicionário encontradas, as passagens de rank_candidates
+        (categorias compatíveis, restantes ou tabela completa), o total de
+        similaridades calculadas, o tempo e a regra vencedora
+    """
+    normalized = fodmap_food['normalized_name']
+    tokens = normalized.split()
+    name_pt = fodmap_food.get('name_pt')
+    
+    passes = []
+    start = time.perf_counter()
+    ranked = rank_food(fodmap_food, matcher, top_k, passes)
+    elapsed = time.perf_counter() - start
+    
+    if fodmap_food['category'] in matcher['partitions']:
+        scopes = ('compatible', 'rest')
+    else:
+        scopes = ('all',)
+    passes = [{'scope': scope, **record} for scope, record in zip(scopes, passes)]
+    
+    winner = None
+    if ranked:
+        pt_food, match_score, match_type = ranked[0]
+        winner = {
+            'rule': match_type,
+            'scope': passes[-1]['scope'],
+            'portuguese_code': pt_food['code'],
+            'portuguese_name': pt_food['original_name'],
+            'match_score': round(match_score, 3),
+        }
+    
+    record = {
+        'fodmap_name': fodmap_food['name'],
+        'fodmap_level': fodmap_food['fodmap_level'],
+        'fodmap_category': fodmap_food['category'],
+        'normalized_name': normalized,
+        'tokens': tokens,
+        'name_pt': name_pt,
+        'portuguese_queries': [' '.join(key) for key in portuguese_queries(name_pt)] if name_pt else [],
+        'dictionary_hits': [
+            [' '.join(tokens[begin:end]), translation]
+            for begin, end, translation in find_phrases(TRANSLATION_TRIE, tokens)
+        ],
+        'passes': passes,
+        'similarity_evaluations': sum(
+            evaluation['evaluations'] for record in passes for evaluation in record['similarity']
+        ),
+        'time_ms': round(elapsed * 1000, 3),
+        'winner': winner,
+    }
+    return ranked, record
+
+
+def trace_matches(fodmap_foods, pt_foods, backend='sequence', top_k=TOP_K, crosswalk=True,
+                  trace_file=TRACE_FILE):
+    """
+    match_all() em série, sem cache, a escrever o registo de trace_food() de
+    cada alimento FODMAP em trace_file (NDJSON) e a mostrar os mais lentos.
+    """
+    start = time.perf_counter()
+    matcher = build_matcher(pt_foods, fodmap_foods, backend, crosswalk=crosswalk)
+    build_time = time.perf_counter() - start
+    
+    entries = []
+    records = []
+    with open(trace_file, 'w', encoding='utf-8') as f:
+        for fodmap_food in fodmap_foods:
+            ranked, record = trace_food(fodmap_food, matcher, top_k)
+            entries.append(build_match_entry(fodmap_food, ranked) if ranked else None)
+            records.append(record)
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+    
+    total_time = sum(record['time_ms'] for record in records)
+    total_evaluations = sum(record['similarity_evaluations'] for record in records)
+    print(f"Trace: {os.path.relpath(trace_file, BASE_DIR)} ({len(records)} alimentos)")
+    print(f"   Matcher: {build_time * 1000:.1f} ms | matching: {total_time:.1f} ms | "
+          f"similaridades calculadas: {total_evaluations}")
+    print(f"   Mais lentos:")
+    for record in sorted(records, key=lambda record: -record['time_ms'])[:TRACE_SLOWEST]:
+        rule = record['winner']['rule'] if record['winner'] else 'sem match'
+        print(f"   {record['time_ms']:8.2f} ms  {record['similarity_evaluations']:6} aval.  "
+              f"{record['fodmap_name'][:40]:40} {rule}")
+    
+    return entries
+
+
+def build_match_entry(fodmap_food, ranked):
+    """
+    Cria a entrada de equivalência FODMAP ↔ tabela portuguesa.
+    
+    Args:
+        fodmap_food: Alimento FODMAP
+        ranked: Candidatos de rank_candidates(); o primeiro é o match
+    """
+    pt_food, score, match_type = ranked[0]
+    margin = score - ranked[1][1] if len(ranked) > 1 else None
+    
+    return {
+        'fodmap_id': fodmap_food['id'],
+        'fodmap_name': fodmap_food['name'],
+        'fodmap_name_pt': fodmap_food.get('name_pt'),
+        'fodmap_normalized': fodmap_food['normalized_name'],
+        'fodmap_level': fodmap_food['fodmap_level'],
+        'fodmap_category': fodmap_food['category'],
+        'fodmap_portion_note': fodmap_food['portion_note'],
+        'portuguese_name': pt_food['original_name'],
+        'portuguese_code': pt_food['code'],
+        'portuguese_main_name': pt_food['main_name'],
+        'portuguese_category': pt_food['category_level_1'],
+        'match_score': round(score, 3),
+        'match_type': match_type,
+        'match_margin': round(margin, 3) if margin is not None else None,
+        'candidates': [
+            {
+                'portuguese_code': candidate['code'],
+                'portuguese_name': candidate['original_name'],
+                'match_score': round(candidate_score, 3),
+                'match_type': candidate_type
+            }
+            for candidate, candidate_score, candidate_type in ranked
+        ]
+    }
+
+
+def fodmap_key(name, level, category, portion_note):
+    """Identifica um alimento FODMAP (o nome sozinho repete-se entre níveis)."""
+    return (name, level, category, portion_note)
+
+
+def update_matches_from_delta(fodmap_foods, pt_foods, backend='sequence', top_k=TOP_K, crosswalk=True):
+    """
+    Atualiza as equivalências anteriores com o delta da tabela portuguesa.
+    
+    Um alimento FODMAP só é recalculado (contra a tabela completa) se o seu
+    match ou algum dos seus candidatos anteriores aponta para uma linha
+    removida/alterada, ou se alguma
+    linha nova/alterada passa os limiares de matching para ele. Nos restantes
+    casos, o resultado anterior continua a ser o da tabela completa.
+    Assume que a base FODMAP não mudou desde a última execução.
+    """
+    table_delta = load_delta()
+    
+    with open(os.path.join(OUTPUT_DIR, 'fodmap_portuguese_equivalences.json'), 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    
+    previous_by_food = {}
+    for match in previous['matches']:
+        key = fodmap_key(match['fodmap_name'], match['fodmap_level'],
+                         match['fodmap_category'], match['fodmap_portion_note'])
+        previous_by_food.setdefault(key, []).append(match)
+    
+    stale_codes = touched_codes(table_delta)
+    new_codes = set(updated_rows(table_delta))
+    new_pt_foods = [pt_food for pt_food in pt_foods if pt_food['code'] in new_codes]
+    matcher = build_matcher(pt_foods, fodmap_foods, backend, crosswalk=crosswalk)
+    new_matcher = build_matcher(new_pt_foods, fodmap_foods, backend, idf_foods=pt_foods)
+    
+    print(f"Delta: {len(new_pt_foods)} alimentos portugueses novos/alterados, "
+          f"{len(table_delta['removed'])} removidos")
+    
+    results = []
+    recomputed = 0
+    
+    for fodmap_food in fodmap_foods:
+        key = fodmap_key(fodmap_food['name'], fodmap_food['fodmap_level'],
+                         fodmap_food['category'], fodmap_food['portion_note'])
+        previous_matches = previous_by_food.get(key)
+        previous_match = previous_matches.pop(0) if previous_matches else None
+        
+        stale = previous_match is not None and any(
+            candidate['portuguese_code'] in stale_codes
+            for candidate in previous_match.get('candidates') or [previous_match]
+        )
+        
+        if stale or match_food(fodmap_food, new_matcher)[0] is not None:
+            recomputed += 1
+            entry = match_entry_or_none(fodmap_food, matcher, top_k)
+            if entry:
+                results.append(entry)
+        elif previous_match is not None:
+            results.append(previous_match)
+    
+    print(f"✓ {recomputed} alimentos FODMAP recalculados, "
+          f"{len(fodmap_foods) - recomputed} reaproveitados")
+    
+    return results
+
+
+def attach_portuguese_names(fodmap_foods, path=FODMAP_DATABASE_PT_FILE):
+    """
+    Junta a cada alimento FODMAP o nome da tradução pt-PT da etapa 04
+    (output/fodmap_database_pt.json) em 'name_pt', pela posição do registo
+    em inglês ('english_index').
+    
+    Returns:
+        Número de alimentos com nome pt-PT
+    """
+    if not os.path.exists(path):
+        print(f"⚠ {os.path.relpath(path, BASE_DIR)} não existe; matching só pelos nomes em inglês")
+        return 0
+    
+    pt_database = load_fodmap_database(path)
+    for pt_fodmap_food in pt_database['foods']:
+        fodmap_foods[pt_fodmap_food['english_index']]['name_pt'] = pt_fodmap_food['name']
+    return len(pt_database['foods'])
+
+
+def build_review_queue(matches, margin=REVIEW_MARGIN):
+    """
+    Matches ambíguos para revisão manual: o 2.º candidato ficou a menos de
+    margin do 1.º. Formato compacto, com os candidatos alternativos.
+    """
+    review = []
+    for match in matches:
+        if match['match_margin'] is None or match['match_margin'] >= margin:
+            continue
+        review.append({
+            'fodmap_name': match['fodmap_name'],
+            'fodmap_level': match['fodmap_level'],
+            'fodmap_category': match['fodmap_category'],
+            'chosen_code': match['portuguese_code'],
+            'margin': match['match_margin'],
+            'candidates': [
+                [c['portuguese_code'], c['portuguese_name'], c['match_score'], c['match_type']]
+                for c in match['candidates']
+            ]
+        })
+    return review
+
+
+def find_matches(delta=False, backend='sequence', workers=1, top_k=TOP_K, review_margin=REVIEW_MARGIN,
+                 use_cache=True, crosswalk=True, trace=False, portuguese_names=True):
+    """
+    Encontra equivalências entre FODMAP e tabela portuguesa.
+    
+    Args:
+        delta: Recalcular apenas os alimentos afetados pelo delta da etapa 01
+        backend: Similaridade usada nos matches parciais/diretos
+            ('sequence' ou 'tfidf', ver build_matcher)
+        workers: Número de processos para o matching completo (o modo delta
+            recalcula poucos alimentos e corre sempre em série)
+        top_k: Candidatos guardados por alimento FODMAP
+        review_margin: Margem entre o 1.º e o 2.º candidato abaixo da qual o
+            match vai para output/fodmap_equivalences_review.json
+        use_cache: Reaproveitar os resultados de execuções anteriores
+            (.match_cache.json) no matching completo
+        crosswalk: Procurar primeiro nas categorias INSA compatíveis com a
+            categoria FODMAP (category_crosswalk.py)
+        trace: Matching completo em série e sem cache, com um registo por
+            alimento FODMAP em output/fodmap_matching_trace.ndjson (ver
+            trace_food)
+        portuguese_names: Procurar primeiro o nome pt-PT de cada alimento
+            (output/fodmap_database_pt.json) diretamente na tabela portuguesa
+    """
     print("Carregando dados...")
     
     # Carregar dados FODMAP
-    with open(os.path.join(OUTPUT_DIR, 'fodmap_database.json'), 'r', encoding='utf-8') as f:
-        fodmap_data = json.load(f)
+    fodmap_data = load_fodmap_database()
     
     # Carregar nomes portugueses
     with open(os.path.join(RAW_DATA_DIR, 'portuguese_food_names.json'), 'r', encoding='utf-8') as f:
@@ -652,85 +1437,32 @@ def find_matches():
     print(f"✓ FODMAP: {len(fodmap_data['foods'])} alimentos")
     print(f"✓ Português: {len(portuguese_data['foods'])} alimentos")
     
-    matches = []
-    auto_matches = 0
-    dict_matches = 0
-    similarity_matches = 0
+    names_pt = 0
+    if portuguese_names:
+        names_pt = attach_portuguese_names(fodmap_data['foods'])
+        print(f"✓ Nomes pt-PT: {names_pt} alimentos FODMAP")
     
     print("\nProcessando matches...")
     
-    for fodmap_food in fodmap_data['foods']:
-        fodmap_name = fodmap_food['name']
-        fodmap_normalized = fodmap_food['normalized_name']
-        
-        best_match = None
-        best_score = 0
-        match_type = None
-        
-        # Extrair palavra-chave do nome FODMAP
-        fodmap_keywords = fodmap_normalized.split()
-        
-        # Tentar matching via dicionário de traduções
-        for keyword in fodmap_keywords:
-            if keyword in TRANSLATION_DICT:
-                translation = TRANSLATION_DICT[keyword]
-                translation_normalized = normalize_name(translation)
-                
-                # Procurar na tabela portuguesa
-                for pt_food in portuguese_data['foods']:
-                    pt_normalized = pt_food['normalized_main']
-                    
-                    # Match exato com tradução
-                    if translation_normalized in pt_normalized or pt_normalized in translation_normalized:
-                        score = 1.0
-                        if score > best_score:
-                            best_score = score
-                            best_match = pt_food
-                            match_type = 'dictionary'
-                    
-                    # Match parcial com tradução
-                    elif translation_normalized and len(translation_normalized) > 3:
-                        sim = similarity(translation_normalized, pt_normalized)
-                        if sim > 0.85 and sim > best_score:
-                            best_score = sim
-                            best_match = pt_food
-                            match_type = 'dictionary_partial'
-        
-        # Se não encontrou match por dicionário, tentar similaridade direta
-        if best_score < 0.7:
-            for pt_food in portuguese_data['foods']:
-                pt_normalized = pt_food['normalized_main']
-                
-                # Tentar similaridade com nome normalizado
-                sim = similarity(fodmap_normalized, pt_normalized)
-                if sim > 0.8 and sim > best_score:
-                    best_score = sim
-                    best_match = pt_food
-                    match_type = 'similarity'
+    if delta:
+        matches = update_matches_from_delta(fodmap_data['foods'], portuguese_data['foods'], backend, top_k,
+                                            crosswalk)
+    else:
+        if trace:
+            entries = trace_matches(fodmap_data['foods'], portuguese_data['foods'], backend, top_k, crosswalk)
+        elif use_cache:
+            entries = match_all_cached(fodmap_data['foods'], portuguese_data['foods'], backend, workers, top_k,
+                                       crosswalk)
+        else:
+            entries = match_all(fodmap_data['foods'], portuguese_data['foods'], backend, workers, top_k,
+                                crosswalk)
         
-        # Se encontrou um match válido
-        if best_match and best_score > 0.7:
-            match_entry = {
-                'fodmap_name': fodmap_name,
-                'fodmap_normalized': fodmap_normalized,
-                'fodmap_level': fodmap_food['fodmap_level'],
-                'fodmap_category': fodmap_food['category'],
-                'fodmap_portion_note': fodmap_food['portion_note'],
-                'portuguese_name': best_match['original_name'],
-                'portuguese_code': best_match['code'],
-                'portuguese_main_name': best_match['main_name'],
-                'portuguese_category': best_match['category_level_1'],
-                'match_score': round(best_score, 3),
-                'match_type': match_type
-            }
-            matches.append(match_entry)
-            
-            if match_type == 'dictionary':
-                dict_matches += 1
-            elif match_type == 'dictionary_partial':
-                dict_matches += 1
-            elif match_type == 'similarity':
-                similarity_matches += 1
+        # Só os alimentos com match válido
+        matches = [entry for entry in entries if entry is not None]
+    
+    portuguese_matches = len([m for m in matches if m['match_type'] in ('portuguese_exact', 'portuguese', 'portuguese_partial')])
+    dict_matches = len([m for m in matches if m['match_type'] in ('dictionary', 'dictionary_partial')])
+    similarity_matches = len([m for m in matches if m['match_type'] == 'similarity'])
     
     # Ordenar por score
     matches.sort(key=lambda x: x['match_score'], reverse=True)
@@ -741,8 +1473,12 @@ def find_matches():
             'total_fodmap_foods': len(fodmap_data['foods']),
             'total_portuguese_foods': len(portuguese_data['foods']),
             'total_matches': len(matches),
+            'portuguese_name_matches': portuguese_matches,
             'dictionary_matches': dict_matches,
             'similarity_matches': similarity_matches,
+            'similarity_backend': backend,
+            'category_crosswalk': crosswalk,
+            'portuguese_names': names_pt,
             'match_rate': f"{(len(matches) / len(fodmap_data['foods']) * 100):.1f}%"
         },
         'matches': matches
@@ -751,13 +1487,23 @@ def find_matches():
     with open(os.path.join(OUTPUT_DIR, 'fodmap_portuguese_equivalences.json'), 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
     
+    # Fila de revisão dos matches ambíguos
+    review = build_review_queue(matches, review_margin)
+    with open(os.path.join(OUTPUT_DIR, 'fodmap_equivalences_review.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadata': {'review_margin': review_margin, 'total': len(review)},
+            'review': review
+        }, f, ensure_ascii=False, indent=1)
+    
     print(f"\n✓ Matching concluído!")
     print(f"✓ Arquivo: output/fodmap_portuguese_equivalences.json")
+    print(f"✓ Revisão: output/fodmap_equivalences_review.json ({len(review)} matches ambíguos)")
     print(f"\n📊 ESTATÍSTICAS:")
     print(f"   Total de alimentos FODMAP: {len(fodmap_data['foods'])}")
     print(f"   Total de alimentos portugueses: {len(portuguese_data['foods'])}")
     print(f"   Total de matches encontrados: {len(matches)}")
     print(f"   Taxa de match: {(len(matches) / len(fodmap_data['foods']) * 100):.1f}%")
+    print(f"   Matches pelo nome pt-PT: {portuguese_matches}")
     print(f"   Matches por dicionário: {dict_matches}")
     print(f"   Matches por similaridade: {similarity_matches}")
     
@@ -784,4 +1530,33 @@ def find_matches():
 
 
 if __name__ == "__main__":
-    find_matches()
+    parser = argparse.ArgumentParser(description='Cria equivalências FODMAP ↔ tabela portuguesa.')
+    parser.add_argument('--delta', action='store_true',
+                        help='Recalcular apenas os alimentos afetados pelo delta da etapa 01')
+    parser.add_argument('--backend', choices=SIMILARITY_BACKENDS, default='sequence',
+                        help='Similaridade para matches parciais/diretos: sequence (SequenceMatcher) '
+                             'ou tfidf (cosseno TF-IDF de trigramas, em lote)')
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help='Processos para o matching (por omissão 1; o resultado é o mesmo)')
+    parser.add_argument('--top-k', type=int, default=TOP_K,
+                        help=f'Candidatos guardados por alimento FODMAP (por omissão {TOP_K})')
+    parser.add_argument('--review-margin', type=float, default=REVIEW_MARGIN,
+                        help=f'Margem entre o 1.º e o 2.º candidato para ir à revisão (por omissão {REVIEW_MARGIN})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignorar a cache de matches e recalcular todos os alimentos')
+    parser.add_argument('--no-crosswalk', action='store_true',
+                        help='Comparar cada alimento FODMAP com a tabela completa, sem filtrar por categoria')
+    parser.add_argument('--trace', action='store_true',
+                        help='Registar o matching de cada alimento FODMAP (palavras, dicionário, candidatos, '
+                             'similaridades, tempo, regra) em output/fodmap_matching_trace.ndjson; '
+                             'corre em série e sem cache')
+    parser.add_argument('--english-only', action='store_true',
+                        help='Não usar os nomes pt-PT (output/fodmap_database_pt.json); só inglês → dicionário')
+    args = parser.parse_args()
+    if args.trace and args.delta:
+        parser.error('--trace não é compatível com --delta')
+    
+    find_matches(delta=args.delta, backend=args.backend, workers=args.workers,
+                 top_k=args.top_k, review_margin=args.review_margin, use_cache=not args.no_cache,
+                 crosswalk=not args.no_crosswalk, trace=args.trace,
+                 portuguese_names=not args.english_only)
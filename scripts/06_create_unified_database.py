@@ -1,10 +1,85 @@
 import json
 import os
 
+from nutrient_schema import NUTRIENT_UNITS, compile_nutrition_builder
+from fodmap_database import fodmap_id, load_fodmap_database
+from table_join import index_by, index_unique, left_join
+
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 
+# Construtor do bloco 'nutrition', compilado a partir da especificação de colunas
+build_nutrition = compile_nutrition_builder()
+
+# Quando um código tem vários matches FODMAP, o principal é o do tipo mais
+# fiável (o nome pt-PT antes da tradução), depois o de maior score e, em caso
+# de empate, o de nome mais curto (o mais genérico: 'Pineapple' antes de
+# 'Pineapple, dried')
+MATCH_TYPE_PRIORITY = ('portuguese_exact', 'portuguese', 'dictionary', 'dictionary_partial', 'similarity',
+                       'portuguese_partial')
+
+
+def equivalence_fodmap_id(match):
+    """
+    'id' do alimento FODMAP de uma equivalência; para ficheiros da etapa 05
+    anteriores ao 'fodmap_id', calculado a partir dos mesmos campos.
+    """
+    if 'fodmap_id' in match:
+        return match['fodmap_id']
+    return fodmap_id({
+        'name': match['fodmap_name'],
+        'fodmap_level': match['fodmap_level'],
+        'category': match['fodmap_category'],
+        'portion_note': match.get('fodmap_portion_note'),
+    })
+
+
+def match_rank(pair):
+    """Chave de ordenação de um match: tipo (por prioridade), score e nome."""
+    match = pair['match']
+    match_type = match['match_type']
+    priority = MATCH_TYPE_PRIORITY.index(match_type) if match_type in MATCH_TYPE_PRIORITY else len(MATCH_TYPE_PRIORITY)
+    return priority, -match['match_score'], len(pair['fodmap']['name'])
+
+
+def build_fodmap_block(pairs):
+    """
+    Cria o bloco 'fodmap' de um alimento a partir dos seus matches
+    ({'match', 'fodmap'}), ordenados do melhor para o pior. O primeiro dá o
+    nível e as notas; os restantes ficam em 'alternatives'.
+    """
+    match = pairs[0]['match']
+    fodmap_info = pairs[0]['fodmap']
+    block = {
+        'level': fodmap_info['fodmap_level'],
+        'portion_note': fodmap_info['portion_note'],
+        'portion': fodmap_info.get('portion'),
+        'additional_notes': fodmap_info['additional_notes'],
+        'search_information': {
+            'category': fodmap_info['category'],
+            'name_english': fodmap_info['name'],
+            'match_score': match['match_score'],
+            'match_type': match['match_type']
+        }
+    }
+    
+    if len(pairs) > 1:
+        block['search_information']['alternatives'] = [
+            {
+                'name_english': pair['fodmap']['name'],
+                'level': pair['fodmap']['fodmap_level'],
+                'category': pair['fodmap']['category'],
+                'portion_note': pair['fodmap']['portion_note'],
+                'match_score': pair['match']['match_score'],
+                'match_type': pair['match']['match_type']
+            }
+            for pair in pairs[1:]
+        ]
+    
+    return block
+
+
 def create_unified_database():
     """
     Cria banco de dados unificado com:
@@ -24,43 +99,43 @@ def create_unified_database():
         equivalences = json.load(f)
     
     # Carregar dados FODMAP completos
-    with open(os.path.join(OUTPUT_DIR, 'fodmap_database.json'), 'r', encoding='utf-8') as f:
-        fodmap_data = json.load(f)
+    fodmap_data = load_fodmap_database()
     
     print(f"✓ Tabela nutricional: {len(nutritional_data)} alimentos")
     print(f"✓ Equivalências: {equivalences['metadata']['total_matches']} matches")
     print(f"✓ Base FODMAP: {len(fodmap_data['foods'])} alimentos")
     
-    # Criar mapeamento de códigos portugueses para dados FODMAP
+    # Índices por chave, construídos uma única vez
     print("\nCriando mapeamento FODMAP...")
-    fodmap_by_pt_code = {}
-    fodmap_matched_names = set()
+    nutrition_by_code = index_unique(nutritional_data, 'code')
     
-    for match in equivalences['matches']:
-        pt_code = match['portuguese_code']
-        fodmap_name = match['fodmap_name']
-        
-        # Buscar dados FODMAP completos
-        fodmap_info = next(
-            (f for f in fodmap_data['foods'] if f['name'] == fodmap_name),
-            None
-        )
-        
-        if fodmap_info and pt_code:
-            fodmap_by_pt_code[pt_code] = {
-                'level': fodmap_info['fodmap_level'],
-                'portion_note': fodmap_info['portion_note'],
-                'additional_notes': fodmap_info['additional_notes'],
-                'search_information': {
-                    'category': fodmap_info['category'],
-                    'name_english': fodmap_info['name'],
-                    'match_score': match['match_score'],
-                    'match_type': match['match_type']
-                }
-            }
-            fodmap_matched_names.add(fodmap_name)
+    # Equivalência -> registo FODMAP com o mesmo 'id' (o nome, nível e
+    # categoria não chegam: 'Cordial' aparece duas vezes em high/Drinks, com
+    # notas de porção diferentes). Só contam as equivalências cujo código
+    # existe na tabela nutricional.
+    fodmap_matches = []
+    matched_fodmap = set()
+    
+    for match, fodmap_info in left_join(equivalences['matches'], equivalence_fodmap_id,
+                                        fodmap_data['foods'], 'id'):
+        if fodmap_info is None or match['portuguese_code'] not in nutrition_by_code:
+            continue
+        fodmap_matches.append({
+            'portuguese_code': match['portuguese_code'],
+            'match': match,
+            'fodmap': fodmap_info
+        })
+        matched_fodmap.add(fodmap_info['id'])
     
-    print(f"✓ {len(fodmap_by_pt_code)} códigos portugueses mapeados para FODMAP")
+    # Código português -> todos os seus matches FODMAP, o melhor primeiro
+    fodmap_by_pt_code = {
+        pt_code: build_fodmap_block(sorted(pairs, key=match_rank))
+        for pt_code, pairs in index_by(fodmap_matches, 'portuguese_code').items()
+    }
+    multiple_matches = sum(1 for block in fodmap_by_pt_code.values() if 'alternatives' in block['search_information'])
+    
+    print(f"✓ {len(fodmap_by_pt_code)} códigos portugueses mapeados para FODMAP "
+          f"({multiple_matches} com mais de um match)")
     
     # Criar banco de dados unificado
     unified_database = []
@@ -85,62 +160,7 @@ def create_unified_database():
             'fodmap': None,
             
             # Dados nutricionais completos
-            'nutrition': {
-                'energy_kcal': food.get('energy_kcal'),
-                'energy_kj': food.get('energy_kj'),
-                'macronutrients': {
-                    'lipids_g': food.get('lipids_g'),
-                    'saturated_fatty_acids_g': food.get('saturated_fatty_acids_g'),
-                    'monounsaturated_fatty_acids_g': food.get('monounsaturated_fatty_acids_g'),
-                    'polyunsaturated_fatty_acids_g': food.get('polyunsaturated_fatty_acids_g'),
-                    'linoleic_acid_g': food.get('linoleic_acid_g'),
-                    'trans_fatty_acids_g': food.get('trans_fatty_acids_g'),
-                    'cholesterol_mg': food.get('cholesterol_mg'),
-                    'carbohydrates_g': food.get('carbohydrates_g'),
-                    'sugars_g': food.get('sugars_g'),
-                    'oligosaccharides_g': food.get('oligosaccharides_g'),
-                    'starch_g': food.get('starch_g'),
-                    'protein_g': food.get('protein_g'),
-                    'fiber_g': food.get('fiber_g'),
-                    'salt_g': food.get('salt_g'),
-                    'alcohol_g': food.get('alcohol_g'),
-                    'water_g': food.get('water_g'),
-                    'organic_acids_g': food.get('organic_acids_g'),
-                    'ash_g': food.get('ash_g'),
-                },
-                'vitamins': {
-                    'vitamin_a_ug': food.get('vitamin_a_ug'),
-                    'carotene_ug': food.get('carotene_ug'),
-                    'alpha_carotene_ug': food.get('alpha_carotene_ug'),
-                    'beta_carotene_ug': food.get('beta_carotene_ug'),
-                    'beta_cryptoxanthin_ug': food.get('beta_cryptoxanthin_ug'),
-                    'lycopene_ug': food.get('lycopene_ug'),
-                    'lutein_ug': food.get('lutein_ug'),
-                    'zeaxanthin_ug': food.get('zeaxanthin_ug'),
-                    'vitamin_d_ug': food.get('vitamin_d_ug'),
-                    'alpha_tocopherol_mg': food.get('alpha_tocopherol_mg'),
-                    'thiamin_mg': food.get('thiamin_mg'),
-                    'riboflavin_mg': food.get('riboflavin_mg'),
-                    'niacin_mg': food.get('niacin_mg'),
-                    'niacin_equivalents_mg': food.get('niacin_equivalents_mg'),
-                    'tryptophan_60_mg': food.get('tryptophan_60_mg'),
-                    'vitamin_b6_mg': food.get('vitamin_b6_mg'),
-                    'vitamin_b12_ug': food.get('vitamin_b12_ug'),
-                    'vitamin_c_mg': food.get('vitamin_c_mg'),
-                    'folates_ug': food.get('folates_ug'),
-                },
-                'minerals': {
-                    'sodium_mg': food.get('sodium_mg'),
-                    'potassium_mg': food.get('potassium_mg'),
-                    'calcium_mg': food.get('calcium_mg'),
-                    'phosphorus_mg': food.get('phosphorus_mg'),
-                    'magnesium_mg': food.get('magnesium_mg'),
-                    'iron_mg': food.get('iron_mg'),
-                    'zinc_mg': food.get('zinc_mg'),
-                    'selenium_ug': food.get('selenium_ug'),
-                    'iodine_ug': food.get('iodine_ug'),
-                }
-            }
+            'nutrition': build_nutrition(food)
         }
         
         # Adicionar dados FODMAP se disponível
@@ -154,7 +174,7 @@ def create_unified_database():
     fodmap_only_count = 0
     
     for fodmap_food in fodmap_data['foods']:
-        if fodmap_food['name'] not in fodmap_matched_names:
+        if fodmap_food['id'] not in matched_fodmap:
             fodmap_only_count += 1
             
             unified_entry = {
@@ -172,6 +192,7 @@ def create_unified_database():
                 'fodmap': {
                     'level': fodmap_food['fodmap_level'],
                     'portion_note': fodmap_food['portion_note'],
+                    'portion': fodmap_food.get('portion'),
                     'additional_notes': fodmap_food['additional_notes'],
                     'search_information': {
                         'category': fodmap_food['category'],
@@ -203,13 +224,14 @@ def create_unified_database():
     
     metadata = {
         'database_name': 'Unified Portuguese Nutritional and FODMAP Database',
-        'version': '1.0',
+        'version': '1.2',
         'creation_date': '2025-12-09',
         'total_foods': total_foods,
         'foods_with_nutritional_data': foods_with_nutrition,
         'foods_with_fodmap_data': foods_with_fodmap,
         'foods_with_complete_data': foods_with_both,
         'foods_fodmap_only': foods_fodmap_only,
+        'nutrient_units': NUTRIENT_UNITS,
         'fodmap_distribution': {
             'high': high_fodmap,
             'low': low_fodmap,
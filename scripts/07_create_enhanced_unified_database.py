@@ -1,53 +1,126 @@
+import argparse
 import json
-import re
 import os
 
+from table_delta import load_delta, updated_rows
+from nutrient_schema import NUTRIENT_UNITS, compile_nutrition_builder
+from text_normalization import compound_words, normalize_name, plural_forms
+from aho_corasick import build_automaton, find_longest, iter_matches
+from fodmap_database import load_fodmap_database
+from table_join import index_by, index_unique
+
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 
-def normalize_name(name):
-    """Normaliza nome para matching."""
-    if not name:
-        return ""
-    name = name.lower()
-    replacements = {
-        'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-        'é': 'e', 'ê': 'e', 'è': 'e',
-        'í': 'i', 'ì': 'i',
-        'ó': 'o', 'ô': 'o', 'õ': 'o', 'ò': 'o',
-        'ú': 'u', 'ü': 'u', 'ù': 'u',
-        'ç': 'c'
-    }
-    for old, new in replacements.items():
-        name = name.replace(old, new)
-    name = re.sub(r'\([^)]*\)', '', name)
-    name = re.sub(r'[,/:;.\-]', ' ', name)
-    name = re.sub(r'\s+', ' ', name)
-    return name.strip()
-
+# Construtor do bloco 'nutrition', compilado a partir da especificação de colunas
+build_nutrition = compile_nutrition_builder()
 
-def create_enhanced_unified_database():
-    """
-    Cria banco de dados unificado com detecção de múltiplos ingredientes FODMAP.
-    """
+# Palavras-chave portuguesas -> FODMAP
+INGREDIENT_KEYWORDS = {
+    # Massas e cereais
+    'massa': ['pasta', 'wheat'],
+    'esparguete': ['spaghetti', 'pasta', 'wheat'],
+    'macarrao': ['pasta', 'wheat', 'noodle'],
+    'pao': ['bread', 'wheat'],
+    'trigo': ['wheat'],
+    'arroz': ['rice'],
+    'aveia': ['oat'],
+    'cevada': ['barley'],
+    'centeio': ['rye'],
     
-    print("Carregando dados...")
+    # Vegetais
+    'alho': ['garlic'],
+    'alho-frances': ['leek'],
+    'cebola': ['onion'],
+    'cebolada': ['onion'],
+    'cebolinha': ['scallion', 'spring onion'],
+    'cenoura': ['carrot'],
+    'tomate': ['tomato'],
+    'cogumelo': ['mushroom'],
+    'espargo': ['asparagus'],
+    'brocolis': ['broccoli'],
+    'brocolos': ['broccoli'],
+    'couve': ['cabbage', 'kale'],
+    'couve-flor': ['cauliflower'],
+    'couve-branca': ['cabbage'],
+    'couve-lombarda': ['cabbage'],
+    'couve-roxa': ['cabbage'],
+    'couve-portuguesa': ['cabbage', 'kale'],
+    'couve-galega': ['kale'],
+    'couve-de-bruxelas': ['brussels sprout'],
+    'espinafre': ['spinach'],
+    'alface': ['lettuce'],
+    'pepino': ['cucumber'],
+    'abobora': ['pumpkin', 'squash'],
+    'beringela': ['eggplant', 'aubergine'],
+    'feijao': ['bean'],
+    'feijao manteiga': ['butter bean'],
+    'feijao-manteiga': ['butter bean'],
+    'feijao-branco': ['bean'],
+    'feijao-verde': ['green bean'],
+    'ervilha': ['pea'],
+    'grao': ['chickpea'],
+    'grao-de-bico': ['chickpea'],
+    'lentilha': ['lentil'],
+    'batata': ['potato'],
+    'aipo': ['celery'],
+    'alcachofra': ['artichoke'],
     
-    with open(os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json'), 'r', encoding='utf-8') as f:
-        nutritional_data = json.load(f)
+    # Frutas
+    'maca': ['apple'],
+    'pera': ['pear'],
+    'banana': ['banana'],
+    'morango': ['strawberry'],
+    'uva': ['grape'],
+    'laranja': ['orange'],
+    'limao': ['lemon'],
+    'abacate': ['avocado'],
+    'manga': ['mango'],
+    'pessego': ['peach'],
+    'ameixa': ['plum'],
+    'cereja': ['cherry'],
+    'melancia': ['watermelon'],
+    'melao': ['melon'],
     
-    with open(os.path.join(OUTPUT_DIR, 'fodmap_database.json'), 'r', encoding='utf-8') as f:
-        fodmap_data = json.load(f)
+    # Carnes e peixes
+    'vaca': ['beef'],
+    'frango': ['chicken'],
+    'porco': ['pork'],
+    'borrego': ['lamb'],
+    'peixe': ['fish'],
+    'peixe-espada-branco': ['fish'],
+    'peixe-espada-preto': ['fish'],
+    'bacalhau': ['cod'],
+    'atum': ['tuna'],
+    'salmao': ['salmon'],
+    'camarao': ['shrimp', 'prawn'],
     
-    print(f"✓ Tabela nutricional: {len(nutritional_data)} alimentos")
-    print(f"✓ Base FODMAP: {len(fodmap_data['foods'])} alimentos")
+    # Laticínios
+    'leite': ['milk'],
+    'queijo': ['cheese'],
+    'iogurte': ['yogurt', 'yoghurt'],
+    'manteiga': ['butter'],
+    'amanteigado': ['butter'],
+    'nata': ['cream'],
     
-    # Criar índice FODMAP por palavras-chave
-    print("\nCriando índice FODMAP por ingredientes...")
+    # Outros
+    'azeite': ['olive oil', 'oil'],
+    'oleo': ['oil'],
+    'mel': ['honey'],
+    'acucar': ['sugar'],
+    'acucarado': ['sugar'],
+}
+
+
+def build_fodmap_index(fodmap_foods):
+    """
+    Cria o índice FODMAP por palavras-chave: nome normalizado completo -> alimento
+    e cada palavra (mínimo 3 caracteres) -> lista de alimentos.
+    """
     fodmap_index = {}
     
-    for fodmap_food in fodmap_data['foods']:
+    for fodmap_food in fodmap_foods:
         name_normalized = fodmap_food['normalized_name']
         words = name_normalized.split()
         
@@ -64,277 +137,234 @@ def create_enhanced_unified_database():
                 else:
                     fodmap_index[word] = [fodmap_index[word], fodmap_food]
     
-    print(f"✓ Índice FODMAP criado com {len(fodmap_index)} entradas")
-    
-    # Palavras-chave portuguesas -> FODMAP
-    ingredient_keywords = {
-        # Massas e cereais
-        'massa': ['pasta', 'wheat', 'spaghetti', 'noodle'],
-        'esparguete': ['spaghetti', 'pasta', 'wheat'],
-        'macarrao': ['pasta', 'wheat', 'noodle'],
-        'massa': ['pasta', 'wheat'],
-        'pao': ['bread', 'wheat'],
-        'trigo': ['wheat'],
-        'arroz': ['rice'],
-        'aveia': ['oat'],
-        'cevada': ['barley'],
-        'centeio': ['rye'],
-        
-        # Vegetais
-        'alho': ['garlic'],
-        'cebola': ['onion'],
-        'cebolinha': ['scallion', 'spring onion'],
-        'cenoura': ['carrot'],
-        'tomate': ['tomato'],
-        'cogumelo': ['mushroom'],
-        'espargo': ['asparagus'],
-        'brocolis': ['broccoli'],
-        'couve': ['cabbage', 'kale'],
-        'couve-flor': ['cauliflower'],
-        'espinafre': ['spinach'],
-        'alface': ['lettuce'],
-        'pepino': ['cucumber'],
-        'abobora': ['pumpkin', 'squash'],
-        'beringela': ['eggplant', 'aubergine'],
-        'feijao': ['bean'],
-        'ervilha': ['pea'],
-        'grao': ['chickpea'],
-        'lentilha': ['lentil'],
-        'batata': ['potato'],
-        'aipo': ['celery'],
-        'alcachofra': ['artichoke'],
-        
-        # Frutas
-        'maca': ['apple'],
-        'pera': ['pear'],
-        'banana': ['banana'],
-        'morango': ['strawberry'],
-        'uva': ['grape'],
-        'laranja': ['orange'],
-        'limao': ['lemon'],
-        'abacate': ['avocado'],
-        'manga': ['mango'],
-        'pessego': ['peach'],
-        'ameixa': ['plum'],
-        'cereja': ['cherry'],
-        'melancia': ['watermelon'],
-        'melao': ['melon'],
-        
-        # Carnes e peixes
-        'vaca': ['beef'],
-        'frango': ['chicken'],
-        'porco': ['pork'],
-        'borrego': ['lamb'],
-        'peixe': ['fish'],
-        'bacalhau': ['cod'],
-        'atum': ['tuna'],
-        'salmao': ['salmon'],
-        'camarao': ['shrimp', 'prawn'],
-        
-        # Laticínios
-        'leite': ['milk'],
-        'queijo': ['cheese'],
-        'iogurte': ['yogurt', 'yoghurt'],
-        'manteiga': ['butter'],
-        'nata': ['cream'],
-        
-        # Outros
-        'azeite': ['olive oil', 'oil'],
-        'oleo': ['oil'],
-        'mel': ['honey'],
-        'acucar': ['sugar'],
+    return fodmap_index
+
+
+def build_name_ids(fodmap_foods):
+    """
+    ID de cada alimento FODMAP -> ID do primeiro alimento com o mesmo nome.
+    O mesmo nome aparece em várias listas ('Bread, wheat' em high e em low)
+    e conta como um único ingrediente.
+    """
+    name_ids = {}
+    for same_name in index_by(fodmap_foods, 'name').values():
+        for fodmap_food in same_name:
+            name_ids[fodmap_food['id']] = same_name[0]['id']
+    return name_ids
+
+
+def keyword_forms(keyword):
+    """
+    Formas de uma palavra-chave procuradas nos nomes: as palavras da
+    palavra-chave (compound_words: 'couve-flor' é uma só palavra) e os
+    plurais da primeira, ou da primeira parte de uma palavra composta
+    ('cebolas', 'feijoes', 'couves-flor').
+    """
+    words = compound_words(keyword)
+    head, hyphen, tail = words[0].partition('-')
+    return [words] + [(plural + hyphen + tail, *words[1:]) for plural in plural_forms(head)]
+
+
+def compile_keyword_scanner(keywords):
+    """
+    Compila as formas das palavras-chave portuguesas num autómato de
+    Aho-Corasick sobre palavras (não caracteres), para só casarem palavras
+    inteiras. Cada forma aponta para a sua palavra-chave.
+    """
+    keywords = list(keywords)
+    patterns = []
+    pattern_keywords = []
+    for keyword_id, keyword in enumerate(keywords):
+        for form in keyword_forms(keyword):
+            patterns.append(form)
+            pattern_keywords.append(keyword_id)
+    return {
+        'keywords': keywords,
+        'pattern_keywords': pattern_keywords,
+        'automaton': build_automaton(patterns),
     }
+
+
+# Compilado uma única vez, a partir de INGREDIENT_KEYWORDS
+KEYWORD_SCANNER = compile_keyword_scanner(INGREDIENT_KEYWORDS)
+
+
+def find_keywords(name, scanner=KEYWORD_SCANNER):
+    """
+    Palavras-chave presentes no nome, numa só passagem, pela ordem de
+    INGREDIENT_KEYWORDS. Só contam palavras inteiras ('mel' não casa em
+    'melao'), uma palavra composta só casa inteira ('alho' não casa em
+    'Alho-francês', 'feijao' não casa em 'Feijão-verde') e a palavra-chave
+    mais longa ganha ('feijao manteiga' e não 'feijao').
+    """
+    matches = find_longest(scanner['automaton'], compound_words(name))
+    pattern_keywords = scanner['pattern_keywords']
+    keyword_ids = {pattern_keywords[pattern_id] for _, _, pattern_id in matches}
+    keywords = scanner['keywords']
+    return [keywords[keyword_id] for keyword_id in sorted(keyword_ids)]
+
+
+def english_keywords():
+    """Equivalentes ingleses de INGREDIENT_KEYWORDS, normalizados e sem repetições."""
+    return list(dict.fromkeys(
+        normalize_name(en_keyword)
+        for en_keywords in INGREDIENT_KEYWORDS.values()
+        for en_keyword in en_keywords
+    ))
+
+
+def build_containment_index(fodmap_index, queries):
+    """
+    Para cada palavra inglesa (query), as chaves do índice FODMAP com um único
+    alimento que contêm a query ou estão contidas nela, pela ordem do índice.
     
-    # Processar cada alimento
-    unified_database = []
-    foods_with_multiple_ingredients = 0
+    Substitui a pesquisa por todas as chaves em cada deteção: um autómato de
+    Aho-Corasick sobre as chaves encontra as chaves contidas em cada query, e
+    um autómato sobre as queries, passado uma vez por cada chave, dá o mapa
+    inverso (chaves que contêm cada query).
+    """
+    keys = [key for key, value in fodmap_index.items() if not isinstance(value, list)]
+    positions = {query: set() for query in queries}
     
-    print("\nAnalisando ingredientes em cada alimento...")
+    key_automaton = build_automaton(keys)
+    for query in queries:
+        positions[query].update(key_id for _, _, key_id in iter_matches(key_automaton, query))
     
-    for food in nutritional_data:
-        name = food.get('name', '')
-        name_normalized = normalize_name(name)
-        
-        # Detectar ingredientes FODMAP
-        detected_ingredients = []
-        
-        # 1. Buscar por palavras-chave portuguesas
-        for pt_keyword, en_keywords in ingredient_keywords.items():
-            if pt_keyword in name_normalized:
-                # Buscar cada equivalente em inglês no índice FODMAP
-                for en_keyword in en_keywords:
-                    en_normalized = normalize_name(en_keyword)
-                    
-                    # Buscar matches no índice
-                    if en_normalized in fodmap_index:
-                        fodmap_match = fodmap_index[en_normalized]
-                        if isinstance(fodmap_match, list):
-                            for match in fodmap_match:
-                                if match not in detected_ingredients:
-                                    detected_ingredients.append({
-                                        'portuguese_keyword': pt_keyword,
-                                        'fodmap_data': match
-                                    })
-                                    break
-                        else:
-                            if fodmap_match not in [d['fodmap_data'] for d in detected_ingredients]:
-                                detected_ingredients.append({
-                                    'portuguese_keyword': pt_keyword,
-                                    'fodmap_data': fodmap_match
-                                })
-                    
-                    # Buscar também por palavras parciais
-                    for key in fodmap_index.keys():
-                        if en_normalized in key or key in en_normalized:
-                            fodmap_match = fodmap_index[key]
-                            if not isinstance(fodmap_match, list):
-                                if fodmap_match not in [d['fodmap_data'] for d in detected_ingredients]:
-                                    detected_ingredients.append({
-                                        'portuguese_keyword': pt_keyword,
-                                        'fodmap_data': fodmap_match
-                                    })
-                                    break
-        
-        # Remover duplicatas baseado no nome FODMAP
-        unique_ingredients = []
-        seen_names = set()
-        for ingredient in detected_ingredients:
-            fodmap_name = ingredient['fodmap_data']['name']
-            if fodmap_name not in seen_names:
-                seen_names.add(fodmap_name)
-                unique_ingredients.append(ingredient)
-        
-        detected_ingredients = unique_ingredients
-        
-        if len(detected_ingredients) > 1:
-            foods_with_multiple_ingredients += 1
-        
-        # Criar entrada unificada
-        unified_entry = {
-            'id': food.get('code'),
-            'name': name,
-            'source': 'nutritional_table',
-            'category_level_1': food.get('category_level_1'),
-            'category_level_2': food.get('category_level_2'),
-            'category_level_3': food.get('category_level_3'),
-        }
-        
-        # Adicionar dados FODMAP
-        if detected_ingredients:
-            if len(detected_ingredients) == 1:
-                # Apenas um ingrediente
-                ingredient = detected_ingredients[0]
+    query_automaton = build_automaton(queries)
+    for key_id, key in enumerate(keys):
+        for _, _, query_id in iter_matches(query_automaton, key):
+            positions[queries[query_id]].add(key_id)
+    
+    return {query: [keys[key_id] for key_id in sorted(key_ids)] for query, key_ids in positions.items()}
+
+
+def build_unified_entry(food, fodmap_index, containment_index, name_ids):
+    """
+    Cria a entrada unificada de um alimento da tabela nutricional, com os
+    ingredientes FODMAP detetados no nome. containment_index vem de
+    build_containment_index(fodmap_index, english_keywords()) e name_ids de
+    build_name_ids().
+    
+    Os alimentos FODMAP são comparados pelos seus IDs (conjuntos e
+    dicionários, sem comparar registos) e cada nome conta uma única vez, com
+    o primeiro alimento detetado.
+    
+    Returns:
+        Tuplo (entrada, número de ingredientes detetados)
+    """
+    name = food.get('name', '')
+    
+    # Detectar ingredientes FODMAP. 'matched' guarda os IDs dos alimentos já
+    # encontrados; 'detected' guarda, por ID do nome FODMAP, a palavra-chave
+    # portuguesa e o primeiro alimento com esse nome, pela ordem de deteção
+    matched = set()
+    detected = {}
+    
+    # 1. Buscar por palavras-chave portuguesas
+    for pt_keyword in find_keywords(name):
+        # Buscar cada equivalente em inglês no índice FODMAP
+        for en_keyword in INGREDIENT_KEYWORDS[pt_keyword]:
+            en_normalized = normalize_name(en_keyword)
+            
+            # Buscar matches no índice (para uma palavra, o primeiro alimento
+            # que a contém)
+            fodmap_match = fodmap_index.get(en_normalized)
+            if isinstance(fodmap_match, list):
+                fodmap_match = fodmap_match[0]
+            if fodmap_match is not None:
+                matched.add(fodmap_match['id'])
+                detected.setdefault(name_ids[fodmap_match['id']], (pt_keyword, fodmap_match))
+            
+            # Buscar também por palavras parciais: o primeiro alimento ainda
+            # não encontrado
+            for key in containment_index[en_normalized]:
+                fodmap_match = fodmap_index[key]
+                if fodmap_match['id'] not in matched:
+                    matched.add(fodmap_match['id'])
+                    detected.setdefault(name_ids[fodmap_match['id']], (pt_keyword, fodmap_match))
+                    break
+    
+    detected_ingredients = [
+        {'portuguese_keyword': pt_keyword, 'fodmap_data': fodmap_match}
+        for pt_keyword, fodmap_match in detected.values()
+    ]
+    
+    # Criar entrada unificada
+    unified_entry = {
+        'id': food.get('code'),
+        'name': name,
+        'source': 'nutritional_table',
+        'category_level_1': food.get('category_level_1'),
+        'category_level_2': food.get('category_level_2'),
+        'category_level_3': food.get('category_level_3'),
+    }
+    
+    # Adicionar dados FODMAP
+    if detected_ingredients:
+        if len(detected_ingredients) == 1:
+            # Apenas um ingrediente
+            ingredient = detected_ingredients[0]
+            fodmap = ingredient['fodmap_data']
+            unified_entry['fodmap'] = {
+                'level': fodmap['fodmap_level'],
+                'portion_note': fodmap['portion_note'],
+                'portion': fodmap.get('portion'),
+                'additional_notes': fodmap['additional_notes'],
+                'search_information': {
+                    'category': fodmap['category'],
+                    'name_english': fodmap['name'],
+                    'detected_keyword': ingredient['portuguese_keyword'],
+                    'match_type': 'single_ingredient'
+                }
+            }
+        else:
+            # Múltiplos ingredientes
+            ingredients_list = []
+            highest_level = 'free'
+            
+            for ingredient in detected_ingredients:
                 fodmap = ingredient['fodmap_data']
-                unified_entry['fodmap'] = {
+                ingredients_list.append({
+                    'portuguese_keyword': ingredient['portuguese_keyword'],
+                    'name_english': fodmap['name'],
                     'level': fodmap['fodmap_level'],
                     'portion_note': fodmap['portion_note'],
-                    'additional_notes': fodmap['additional_notes'],
-                    'search_information': {
-                        'category': fodmap['category'],
-                        'name_english': fodmap['name'],
-                        'detected_keyword': ingredient['portuguese_keyword'],
-                        'match_type': 'single_ingredient'
-                    }
-                }
-            else:
-                # Múltiplos ingredientes
-                ingredients_list = []
-                highest_level = 'free'
+                    'portion': fodmap.get('portion'),
+                    'category': fodmap['category']
+                })
                 
-                for ingredient in detected_ingredients:
-                    fodmap = ingredient['fodmap_data']
-                    ingredients_list.append({
-                        'portuguese_keyword': ingredient['portuguese_keyword'],
-                        'name_english': fodmap['name'],
-                        'level': fodmap['fodmap_level'],
-                        'portion_note': fodmap['portion_note'],
-                        'category': fodmap['category']
-                    })
-                    
-                    # Determinar nível mais alto
-                    if fodmap['fodmap_level'] == 'high':
-                        highest_level = 'high'
-                    elif fodmap['fodmap_level'] == 'low' and highest_level != 'high':
-                        highest_level = 'low'
-                
-                unified_entry['fodmap'] = {
-                    'level': highest_level,
-                    'portion_note': f"Contains {len(ingredients_list)} FODMAP ingredients",
-                    'additional_notes': "Multiple ingredients detected - check individual ingredients below",
-                    'search_information': {
-                        'match_type': 'multiple_ingredients',
-                        'total_ingredients': len(ingredients_list),
-                        'ingredients': ingredients_list
-                    }
+                # Determinar nível mais alto
+                if fodmap['fodmap_level'] == 'high':
+                    highest_level = 'high'
+                elif fodmap['fodmap_level'] == 'low' and highest_level != 'high':
+                    highest_level = 'low'
+            
+            unified_entry['fodmap'] = {
+                'level': highest_level,
+                'portion_note': f"Contains {len(ingredients_list)} FODMAP ingredients",
+                'portion': None,
+                'additional_notes': "Multiple ingredients detected - check individual ingredients below",
+                'search_information': {
+                    'match_type': 'multiple_ingredients',
+                    'total_ingredients': len(ingredients_list),
+                    'ingredients': ingredients_list
                 }
-        else:
-            unified_entry['fodmap'] = None
-        
-        # Adicionar dados nutricionais
-        unified_entry['nutrition'] = {
-            'energy_kcal': food.get('energy_kcal'),
-            'energy_kj': food.get('energy_kj'),
-            'macronutrients': {
-                'lipids_g': food.get('lipids_g'),
-                'saturated_fatty_acids_g': food.get('saturated_fatty_acids_g'),
-                'monounsaturated_fatty_acids_g': food.get('monounsaturated_fatty_acids_g'),
-                'polyunsaturated_fatty_acids_g': food.get('polyunsaturated_fatty_acids_g'),
-                'linoleic_acid_g': food.get('linoleic_acid_g'),
-                'trans_fatty_acids_g': food.get('trans_fatty_acids_g'),
-                'cholesterol_mg': food.get('cholesterol_mg'),
-                'carbohydrates_g': food.get('carbohydrates_g'),
-                'sugars_g': food.get('sugars_g'),
-                'oligosaccharides_g': food.get('oligosaccharides_g'),
-                'starch_g': food.get('starch_g'),
-                'protein_g': food.get('protein_g'),
-                'fiber_g': food.get('fiber_g'),
-                'salt_g': food.get('salt_g'),
-                'alcohol_g': food.get('alcohol_g'),
-                'water_g': food.get('water_g'),
-                'organic_acids_g': food.get('organic_acids_g'),
-                'ash_g': food.get('ash_g'),
-            },
-            'vitamins': {
-                'vitamin_a_ug': food.get('vitamin_a_ug'),
-                'carotene_ug': food.get('carotene_ug'),
-                'alpha_carotene_ug': food.get('alpha_carotene_ug'),
-                'beta_carotene_ug': food.get('beta_carotene_ug'),
-                'beta_cryptoxanthin_ug': food.get('beta_cryptoxanthin_ug'),
-                'lycopene_ug': food.get('lycopene_ug'),
-                'lutein_ug': food.get('lutein_ug'),
-                'zeaxanthin_ug': food.get('zeaxanthin_ug'),
-                'vitamin_d_ug': food.get('vitamin_d_ug'),
-                'alpha_tocopherol_mg': food.get('alpha_tocopherol_mg'),
-                'thiamin_mg': food.get('thiamin_mg'),
-                'riboflavin_mg': food.get('riboflavin_mg'),
-                'niacin_mg': food.get('niacin_mg'),
-                'niacin_equivalents_mg': food.get('niacin_equivalents_mg'),
-                'tryptophan_60_mg': food.get('tryptophan_60_mg'),
-                'vitamin_b6_mg': food.get('vitamin_b6_mg'),
-                'vitamin_b12_ug': food.get('vitamin_b12_ug'),
-                'vitamin_c_mg': food.get('vitamin_c_mg'),
-                'folates_ug': food.get('folates_ug'),
-            },
-            'minerals': {
-                'sodium_mg': food.get('sodium_mg'),
-                'potassium_mg': food.get('potassium_mg'),
-                'calcium_mg': food.get('calcium_mg'),
-                'phosphorus_mg': food.get('phosphorus_mg'),
-                'magnesium_mg': food.get('magnesium_mg'),
-                'iron_mg': food.get('iron_mg'),
-                'zinc_mg': food.get('zinc_mg'),
-                'selenium_ug': food.get('selenium_ug'),
-                'iodine_ug': food.get('iodine_ug'),
             }
-        }
-        
-        unified_database.append(unified_entry)
+    else:
+        unified_entry['fodmap'] = None
     
-    # Adicionar alimentos FODMAP puros
-    print("\nAdicionando alimentos FODMAP sem dados nutricionais...")
+    # Adicionar dados nutricionais
+    unified_entry['nutrition'] = build_nutrition(food)
+    
+    return unified_entry, len(detected_ingredients)
+
+
+def build_fodmap_only_entries(fodmap_foods):
+    """Cria as entradas dos alimentos FODMAP sem dados nutricionais."""
+    entries = []
     fodmap_only_count = 0
     
-    for fodmap_food in fodmap_data['foods']:
+    for fodmap_food in fodmap_foods:
         fodmap_only_count += 1
         
         unified_entry = {
@@ -347,6 +377,7 @@ def create_enhanced_unified_database():
             'fodmap': {
                 'level': fodmap_food['fodmap_level'],
                 'portion_note': fodmap_food['portion_note'],
+                'portion': fodmap_food.get('portion'),
                 'additional_notes': fodmap_food['additional_notes'],
                 'search_information': {
                     'category': fodmap_food['category'],
@@ -357,8 +388,74 @@ def create_enhanced_unified_database():
             'nutrition': None
         }
         
+        entries.append(unified_entry)
+    
+    return entries
+
+
+def create_enhanced_unified_database(delta=False):
+    """
+    Cria banco de dados unificado com detecção de múltiplos ingredientes FODMAP.
+    Com delta=True, analisa apenas os alimentos do delta da etapa 01 e
+    reaproveita as restantes entradas da execução anterior.
+    """
+    
+    print("Carregando dados...")
+    
+    with open(os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json'), 'r', encoding='utf-8') as f:
+        nutritional_data = json.load(f)
+    
+    fodmap_data = load_fodmap_database()
+    
+    print(f"✓ Tabela nutricional: {len(nutritional_data)} alimentos")
+    print(f"✓ Base FODMAP: {len(fodmap_data['foods'])} alimentos")
+    
+    # Criar índice FODMAP por palavras-chave
+    print("\nCriando índice FODMAP por ingredientes...")
+    fodmap_index = build_fodmap_index(fodmap_data['foods'])
+    
+    containment_index = build_containment_index(fodmap_index, english_keywords())
+    name_ids = build_name_ids(fodmap_data['foods'])
+    
+    print(f"✓ Índice FODMAP criado com {len(fodmap_index)} entradas")
+    
+    previous_by_id = None
+    if delta:
+        new_codes = set(updated_rows(load_delta()))
+        with open(os.path.join(OUTPUT_DIR, 'unified_food_database.json'), 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        previous_by_id = index_unique(
+            (entry for entry in previous['foods'] if entry['source'] == 'nutritional_table'), 'id'
+        )
+        print(f"Delta: {len(new_codes)} alimentos novos/alterados a analisar")
+    
+    # Processar cada alimento
+    unified_database = []
+    foods_with_multiple_ingredients = 0
+    
+    print("\nAnalisando ingredientes em cada alimento...")
+    
+    for food in nutritional_data:
+        code = food.get('code')
+        
+        if delta and code not in new_codes and code in previous_by_id:
+            unified_entry = previous_by_id[code]
+            fodmap_info = unified_entry['fodmap']
+            multiple = bool(fodmap_info) and fodmap_info['search_information']['match_type'] == 'multiple_ingredients'
+        else:
+            unified_entry, ingredient_count = build_unified_entry(food, fodmap_index, containment_index, name_ids)
+            multiple = ingredient_count > 1
+        
+        if multiple:
+            foods_with_multiple_ingredients += 1
+        
         unified_database.append(unified_entry)
     
+    # Adicionar alimentos FODMAP puros
+    print("\nAdicionando alimentos FODMAP sem dados nutricionais...")
+    unified_database.extend(build_fodmap_only_entries(fodmap_data['foods']))
+    
+
     # Estatísticas
     total_foods = len(unified_database)
     foods_with_fodmap = len([f for f in unified_database if f['fodmap'] is not None])
@@ -366,7 +463,7 @@ def create_enhanced_unified_database():
     
     metadata = {
         'database_name': 'Enhanced Unified Portuguese Nutritional and FODMAP Database',
-        'version': '2.0',
+        'version': '2.2',
         'creation_date': '2025-12-09',
         'features': [
             'Multiple ingredient detection',
@@ -377,6 +474,7 @@ def create_enhanced_unified_database():
         'foods_with_fodmap_data': foods_with_fodmap,
         'foods_with_nutritional_data': foods_with_nutrition,
         'foods_with_multiple_ingredients': foods_with_multiple_ingredients,
+        'nutrient_units': NUTRIENT_UNITS,
         'sources': {
             'nutritional_data': 'INSA - Tabela da Composição de Alimentos (Portugal)',
             'fodmap_data': 'Monash University FODMAP Database & Multiple FODMAP Sources'
@@ -422,4 +520,9 @@ def create_enhanced_unified_database():
 
 
 if __name__ == "__main__":
-    create_enhanced_unified_database()
+    parser = argparse.ArgumentParser(description='Cria o banco de dados unificado com detecção de ingredientes.')
+    parser.add_argument('--delta', action='store_true',
+                        help='Analisar apenas os alimentos do delta da etapa 01')
+    args = parser.parse_args()
+    
+    create_enhanced_unified_database(delta=args.delta)
@@ -0,0 +1,106 @@
+"""
+Autómato de Aho-Corasick para procurar muitas strings num texto de uma vez.
+
+build_automaton() compila uma lista de padrões numa trie com ligações de
+falha; iter_matches() percorre o texto uma única vez e devolve todas as
+ocorrências de todos os padrões (incluindo sobrepostas), em tempo linear no
+tamanho do texto mais o número de ocorrências, seja qual for o número de
+padrões.
+
+Os padrões e o texto são sequências: strings (procura de substrings) ou
+tuplos/listas de palavras, em que só casam palavras inteiras.
+find_longest() escolhe entre as ocorrências as mais longas, sem sobreposição.
+
+Os padrões são identificados pela sua posição na lista. Padrões vazios são
+ignorados (quem precisar deles trata-os à parte: '' ocorre em qualquer texto).
+"""
+from collections import deque
+
+
+def build_automaton(patterns):
+    """
+    Compila os padrões num autómato.
+
+    Returns:
+        Dicionário com 'goto' (por estado, carácter -> estado seguinte),
+        'fail' (estado de falha), 'output' (por estado, posições dos padrões
+        que terminam nele) e 'lengths' (comprimento de cada padrão)
+    """
+    goto = [{}]
+    output = [[]]
+
+    for pattern_id, pattern in enumerate(patterns):
+        if not pattern:
+            continue
+        state = 0
+        for char in pattern:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                output.append([])
+            state = next_state
+        output[state].append(pattern_id)
+
+    # Ligações de falha por largura: o estado de falha de cada nó é o maior
+    # sufixo próprio do seu caminho que também é um caminho na trie
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            output[next_state] = output[next_state] + output[fail[next_state]]
+
+    return {
+        'goto': goto,
+        'fail': fail,
+        'output': [tuple(ids) for ids in output],
+        'lengths': [len(pattern) for pattern in patterns],
+    }
+
+
+def iter_matches(automaton, text):
+    """
+    Ocorrências dos padrões no texto, como (início, fim, posição do padrão),
+    com fim exclusivo, pela ordem em que terminam.
+    """
+    goto = automaton['goto']
+    fail = automaton['fail']
+    output = automaton['output']
+    lengths = automaton['lengths']
+    state = 0
+
+    for end, char in enumerate(text, 1):
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for pattern_id in output[state]:
+            yield end - lengths[pattern_id], end, pattern_id
+
+
+def find_longest(automaton, sequence):
+    """
+    Ocorrências mais à esquerda e mais longas, sem sobreposição. Com padrões
+    de palavras e a sequência de palavras de um nome, só casam palavras
+    inteiras: com os padrões ('couve',) e ('couve', 'flor'), em
+    ['couve', 'flor', 'cozida'] fica só ('couve', 'flor'), e ('mel',) não
+    casa em ['melao'].
+
+    Returns:
+        Lista de (início, fim, posição do padrão), pela ordem da sequência
+    """
+    matches = sorted((start, -end, pattern_id) for start, end, pattern_id in iter_matches(automaton, sequence))
+
+    selected = []
+    last_end = 0
+    for start, negative_end, pattern_id in matches:
+        if start >= last_end:
+            selected.append((start, -negative_end, pattern_id))
+            last_end = -negative_end
+    return selected
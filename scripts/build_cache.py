@@ -0,0 +1,145 @@
+"""
+Cache de etapas do pipeline baseado em hashes de conteúdo.
+
+Cada etapa tem uma chave calculada a partir do hash dos ficheiros de entrada,
+do código (o script e os módulos locais que importa) e dos parâmetros. A
+chave e o hash das saídas ficam registados no manifesto de build; uma etapa
+só volta a correr quando a chave muda ou quando as saídas já não estão no
+estado em que o pipeline as deixou.
+"""
+import ast
+import hashlib
+import json
+import os
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPTS_DIR)
+MANIFEST_FILE = os.path.join(BASE_DIR, '.build_manifest.json')
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Calcula o SHA-256 de um ficheiro, lendo-o em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_text(text):
+    """Calcula o SHA-256 de uma string."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def code_dependencies(script_path):
+    """
+    Devolve o script e todos os módulos locais (da pasta scripts/) que ele
+    importa, direta ou indiretamente.
+    """
+    seen = []
+    pending = [os.path.abspath(script_path)]
+
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+
+            for name in names:
+                module_path = os.path.join(SCRIPTS_DIR, name.split('.')[0] + '.py')
+                if os.path.exists(module_path):
+                    pending.append(module_path)
+
+    return sorted(seen)
+
+
+def relative_path(path):
+    """Caminho relativo à raiz do repositório (chave estável no manifesto)."""
+    return os.path.relpath(os.path.abspath(path), BASE_DIR).replace(os.sep, '/')
+
+
+def stage_key(inputs, script_path, params):
+    """
+    Calcula a chave de uma etapa.
+
+    Args:
+        inputs: Lista de caminhos dos ficheiros de entrada
+        script_path: Caminho do script da etapa
+        params: Lista de argumentos passados ao script
+
+    Returns:
+        Tuplo (chave, detalhe) onde detalhe regista o hash de cada componente.
+    """
+    detail = {
+        'inputs': {relative_path(p): hash_file(p) for p in inputs},
+        'code': {relative_path(p): hash_file(p) for p in code_dependencies(script_path)},
+        'params': list(params),
+    }
+    key = hash_text(json.dumps(detail, sort_keys=True))
+    return key, detail
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """Carrega o manifesto de build (ou um manifesto vazio)."""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'stages': {}, 'files': {}}
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """Grava o manifesto de build."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def is_up_to_date(manifest, stage_id, key, outputs, stage_order):
+    """
+    Verifica se uma etapa pode ser saltada.
+
+    A chave tem de coincidir com a registada e cada saída tem de existir com o
+    hash com que o pipeline a deixou. Uma saída reescrita por uma etapa
+    posterior (ex: unified_food_database.json, gerado pela 06 e substituído
+    pela 07) continua válida para a etapa anterior.
+    """
+    entry = manifest['stages'].get(stage_id)
+    if not entry or entry['key'] != key:
+        return False
+
+    for output in outputs:
+        record = manifest['files'].get(relative_path(output))
+        if not record or not os.path.exists(output):
+            return False
+        if record['hash'] != hash_file(output):
+            return False
+        if record['stage'] not in stage_order:
+            return False
+        if stage_order.index(record['stage']) < stage_order.index(stage_id):
+            return False
+
+    return True
+
+
+def record_stage(manifest, stage_id, key, detail, outputs):
+    """Regista uma etapa concluída e o hash das saídas que escreveu."""
+    manifest['stages'][stage_id] = {'key': key, 'detail': detail}
+    for output in outputs:
+        manifest['files'][relative_path(output)] = {
+            'hash': hash_file(output),
+            'stage': stage_id,
+        }
@@ -0,0 +1,64 @@
+"""
+Correspondência entre as categorias FODMAP e as categorias de nível 1 da
+tabela INSA, usada pela etapa 05 para restringir os candidatos de cada
+alimento FODMAP às categorias compatíveis (um fruto não é comparado com os
+peixes nem com os laticínios).
+
+As categorias das listas FODMAP nem sempre são limpas: a secção 'Fruit'
+também apanha bebidas, adoçantes e condimentos, e a 'Dairy Foods' inclui ovos,
+margarina e tofu. Por isso algumas categorias FODMAP correspondem a várias
+categorias INSA. Os 'Pratos compostos' ficam de fora de todas: um prato nunca
+é o equivalente de um alimento simples.
+
+Categorias FODMAP sem entrada usam a tabela completa.
+"""
+
+# Categorias de nível 1 da tabela INSA
+FRUIT = 'Frutos e produtos derivados de frutos'
+VEGETABLES = 'Produtos hortícolas e derivados'
+LEGUMES_NUTS = 'Leguminosas, frutos de casca rija, sementes oleaginosas e especiarias'
+ROOTS = 'Raízes amiláceas ou tubérculos e seus produtos, plantas sacarinas'
+CEREALS = 'Cereais e produtos à base de cereais'
+MEAT = 'Carne e produtos cárneos'
+FISH = 'Peixes, mariscos, anfíbios, répteis e invertebrados'
+INVERTEBRATES = 'Anfíbios, répteis, e invertebrados terrestres'
+DAIRY = 'Leite e produtos lácteos'
+EGGS = 'Ovos e ovoprodutos'
+FATS = 'Óleos e gorduras de origem animal e vegetal e seus derivados'
+SUGAR = 'Açúcar e similares, confeitaria e sobremesas doces à base de água'
+JUICES = 'Sumos e néctares de frutos e produtos hortícolas (incluindo concentrados)'
+ALCOHOL = 'Bebidas alcoólicas'
+WATER = 'Água e bebidas à base de água'
+COFFEE_TEA = 'Café, cacau, chá e tisanas'
+CONDIMENTS = 'Temperos, molhos e condimentos'
+DIET = 'Produtos para dietas não padronizadas, substitutos de alimentos e suplementos alimentares'
+INGREDIENTS = 'Ingredientes principais isolados, aditivos, aromas, fermentos e auxiliares tecnológicos'
+
+PLANTS = (VEGETABLES, LEGUMES_NUTS, ROOTS, FRUIT, CONDIMENTS)
+GRAINS = (CEREALS, LEGUMES_NUTS, ROOTS, INGREDIENTS, SUGAR)
+DRINKS = (ALCOHOL, WATER, COFFEE_TEA, JUICES, DIET)
+
+# Categoria FODMAP -> categorias INSA compatíveis
+CATEGORY_CROSSWALK = {
+    'Vegetables and Legumes': PLANTS,
+    'Vegetables': PLANTS,
+    'Fruit': (FRUIT, JUICES, SUGAR, CONDIMENTS, INGREDIENTS) + DRINKS,
+    'Fruits': (FRUIT, JUICES),
+    'Meats, Poultry and Meat Substitutes': (MEAT, DIET),
+    'Meat and Fish': (MEAT, FISH, INVERTEBRATES),
+    'Fish and Seafood': (FISH, INVERTEBRATES),
+    'Cereals, Grains, Breads, Biscuits, Pasta, Nuts and Cakes': GRAINS,
+    'Cereals, Grains, Breads, Biscuits/Cookies, Pasta, Nuts and Cakes': GRAINS,
+    'Condiments, Dips, Sweets, Sweeteners and Spreads': (CONDIMENTS, SUGAR, FRUIT, LEGUMES_NUTS, FATS, INGREDIENTS),
+    'Drinks and Protein Powders': DRINKS + (FRUIT, DAIRY, SUGAR),
+    'Dairy Foods': (DAIRY, EGGS, FATS, SUGAR, DIET),
+    'Cooking ingredients': (CONDIMENTS, INGREDIENTS, FATS, COFFEE_TEA, SUGAR, LEGUMES_NUTS, VEGETABLES),
+    'Prebiotic Foods': (INGREDIENTS, DIET),
+    'Other Foods': (FATS, EGGS, CEREALS, CONDIMENTS, VEGETABLES),
+}
+
+
+def compatible_categories(fodmap_category):
+    """Categorias INSA (frozenset) compatíveis, ou None para usar a tabela completa."""
+    categories = CATEGORY_CROSSWALK.get(fodmap_category)
+    return frozenset(categories) if categories is not None else None
@@ -0,0 +1,126 @@
+"""
+Leitura e escrita de output/fodmap_database.json.
+
+Cada alimento é guardado uma única vez, em 'foods'. As vistas agrupadas
+'by_category' e 'by_level' guardam apenas índices (posições em 'foods'):
+
+    "by_level": {"high": [0, 1, 2, ...], "low": [...], "free": [...]}
+
+load_fodmap_database() devolve o mesmo dicionário, mas com 'by_category' e
+'by_level' como vistas que só resolvem os índices em registos quando uma
+categoria/nível é acedido, por isso quem usa apenas 'foods' não paga nada.
+Também lê ficheiros no formato antigo, com os registos repetidos nas vistas
+em vez de índices.
+
+Cada alimento tem um 'id' inteiro estável, calculado a partir de (nome,
+nível, categoria, nota de porção) por fodmap_id(). Não depende da posição do
+alimento nas listas: acrescentar ou retirar uma linha não muda o ID dos
+outros alimentos, por isso pode ser guardado fora do pipeline. Só muda se
+um destes quatro campos mudar. As etapas seguintes comparam alimentos por ID
+em vez de por conteúdo. Ficheiros gravados antes dos IDs recebem-nos ao
+serem lidos.
+
+O 'normalized_name' não é guardado: é normalize_name(nome), por isso
+load_fodmap_database() recalcula-o ao ler.
+
+output/fodmap_database_pt.json (as listas em pt-PT, também da etapa 04) usa
+o mesmo formato, com cada alimento ligado ao registo em inglês por
+'english_index' e com o mesmo 'id' do registo em inglês.
+"""
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+from text_normalization import normalize_name
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+FODMAP_DATABASE_FILE = os.path.join(OUTPUT_DIR, 'fodmap_database.json')
+FODMAP_DATABASE_PT_FILE = os.path.join(OUTPUT_DIR, 'fodmap_database_pt.json')
+
+# Bytes do hash usados no ID: 48 bits cabem num inteiro exato em JavaScript
+ID_BYTES = 6
+
+
+def fodmap_id(food):
+    """ID estável de um alimento FODMAP, a partir do nome, nível, categoria e nota de porção."""
+    fields = (food['name'], food['fodmap_level'], food['category'], food.get('portion_note') or '')
+    digest = hashlib.blake2b('\x1f'.join(fields).encode('utf-8'), digest_size=ID_BYTES).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def assign_ids(foods):
+    """
+    Dá a cada alimento o seu 'id' (como primeiro campo).
+
+    Raises:
+        ValueError: Se dois alimentos tiverem o mesmo ID
+    """
+    with_ids = []
+    seen = {}
+    for food in foods:
+        food_id = fodmap_id(food)
+        if food_id in seen:
+            raise ValueError(f"ID FODMAP repetido: {food['name']!r} e {seen[food_id]!r}")
+        seen[food_id] = food['name']
+        with_ids.append({'id': food_id, **food})
+    return with_ids
+
+
+def group_indices(foods, field, keys=()):
+    """
+    Agrupa as posições dos alimentos pelo valor de um campo.
+
+    Args:
+        foods: Lista de alimentos
+        field: Campo usado para agrupar (ex: 'category', 'fodmap_level')
+        keys: Grupos que devem existir mesmo vazios, por esta ordem
+    """
+    groups = {key: [] for key in keys}
+    for index, food in enumerate(foods):
+        groups.setdefault(food[field], []).append(index)
+    return groups
+
+
+class GroupedFoods(Mapping):
+    """Vista grupo -> lista de alimentos, resolvida a partir dos índices."""
+
+    def __init__(self, foods, indices):
+        self._foods = foods
+        self._indices = indices
+        self._resolved = {}
+
+    def __getitem__(self, key):
+        if key not in self._resolved:
+            foods = self._foods
+            # Formato antigo: o grupo já tem os registos em vez de índices
+            self._resolved[key] = [foods[i] if isinstance(i, int) else i for i in self._indices[key]]
+        return self._resolved[key]
+
+    def __iter__(self):
+        return iter(self._indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+
+def save_fodmap_database(database, path=FODMAP_DATABASE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(database, f, ensure_ascii=False, indent=2)
+
+
+def load_fodmap_database(path=FODMAP_DATABASE_FILE):
+    """Lê o banco de dados FODMAP com as vistas agrupadas preguiçosas e os nomes normalizados."""
+    with open(path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+
+    foods = database['foods']
+    for food in foods:
+        if 'id' not in food:
+            food['id'] = fodmap_id(food)
+        if 'normalized_name' not in food:
+            food['normalized_name'] = normalize_name(food['name'])
+    for view in ('by_category', 'by_level'):
+        database[view] = GroupedFoods(foods, database[view])
+    return database
@@ -0,0 +1,152 @@
+"""
+Parsing das listas FODMAP em texto (raw-data/*_fodmap.txt).
+
+As listas têm sempre o mesmo formato: linhas de categoria, linhas
+informativas a ignorar e itens indentados (4+ espaços) pertencentes à última
+categoria vista. Cada linha é classificada uma única vez por expressões
+regulares compiladas (uma alternação para as categorias, outra para as linhas
+a ignorar), pelo que o custo é linear no tamanho do ficheiro, mesmo para
+listas com dezenas de milhares de linhas.
+"""
+import re
+
+# Tipos de linha devolvidos pelo classificador
+LINE_BLANK = 'blank'
+LINE_CATEGORY = 'category'
+LINE_SKIP = 'skip'
+LINE_ITEM = 'item'
+LINE_TEXT = 'text'
+
+ITEM_INDENT = '    '
+
+# Segunda parte de "Nome, porção" que parece de facto uma porção
+PORTION_PATTERN = re.compile(r'\d|cup|tbsp|tsp|slice|pod|glass|up to|over|less than', re.IGNORECASE)
+_NAME_COMMA_REST = re.compile(r'(.+?),\s+(.+)')
+
+
+def compile_alternation(phrases, exact=False, notes=False):
+    """
+    Compila uma lista de frases numa única regex. Em cada posição as
+    alternativas são tentadas pela ordem da lista, por isso uma frase que é
+    prefixo de outra (ex: 'Dairy Foods' e 'Dairy Foods and Eggs') ganha se
+    vier primeiro, tal como num ciclo 'for phrase in phrases'.
+    Com exact, a frase tem de ir até ao fim do texto (ou, com notes, até
+    uma nota ' - ...'). Devolve None para uma lista vazia.
+    """
+    if not phrases:
+        return None
+    pattern = '|'.join(re.escape(phrase) for phrase in phrases)
+    if exact:
+        return re.compile(f'(?:{pattern})(?=\\Z| - )' if notes else f'(?:{pattern})\\Z')
+    return re.compile(pattern)
+
+
+def compile_line_classifier(categories, skip_phrases=(), exact_categories=False, category_notes=False):
+    """
+    Compila o classificador de linhas de uma lista FODMAP.
+
+    Args:
+        categories: Nomes das categorias principais
+        skip_phrases: Frases que marcam linhas informativas a ignorar
+        exact_categories: A linha tem de ser exatamente o nome da categoria
+            (por omissão basta contê-lo)
+        category_notes: Com exact_categories, aceitar também o nome seguido
+            de uma nota ('Fruta - as frutas podem conter muita frutose')
+
+    Returns:
+        classify(raw_line) -> (tipo, texto). Para categorias, texto é o nome
+        da categoria; nos restantes casos é a linha sem espaços nas pontas.
+    """
+    category_regex = compile_alternation(categories, exact=exact_categories, notes=category_notes)
+    skip_regex = compile_alternation(skip_phrases)
+    find_category = category_regex.match if exact_categories else category_regex.search
+
+    def classify(raw_line):
+        line = raw_line.strip()
+        if not line:
+            return LINE_BLANK, line
+
+        match = find_category(line)
+        if match:
+            # A alternativa que casou é o próprio nome da categoria
+            return LINE_CATEGORY, match.group(0)
+
+        if skip_regex is not None and skip_regex.search(line):
+            return LINE_SKIP, line
+
+        if raw_line.startswith(ITEM_INDENT):
+            return LINE_ITEM, line
+
+        return LINE_TEXT, line
+
+    return classify
+
+
+def iter_category_items(lines, classify):
+    """
+    Percorre as linhas uma vez e devolve (categoria, texto) para cada item
+    indentado, mantendo como estado a última categoria vista. Itens antes da
+    primeira categoria são ignorados.
+    """
+    current_category = None
+
+    for raw_line in lines:
+        kind, text = classify(raw_line)
+        if kind == LINE_CATEGORY:
+            current_category = text
+        elif kind == LINE_ITEM and current_category:
+            yield current_category, text
+
+
+def iter_content_lines(lines, classify, ignore_lines=frozenset()):
+    """
+    Percorre, a partir da primeira categoria, as linhas com conteúdo e
+    devolve (tipo, categoria atual, texto). Ficam de fora as linhas em
+    branco, as linhas cujo texto está em ignore_lines e as linhas
+    informativas não indentadas; as indentadas (notas de um item) ficam.
+
+    Uma lista e a sua tradução dão assim a mesma sequência, linha a linha,
+    o que permite alinhá-las por posição.
+    """
+    current_category = None
+
+    for raw_line in lines:
+        kind, text = classify(raw_line)
+        if kind == LINE_CATEGORY:
+            current_category = text
+        if current_category is None or kind == LINE_BLANK or text in ignore_lines:
+            continue
+        if kind == LINE_SKIP and not raw_line.startswith(ITEM_INDENT):
+            continue
+        yield kind, current_category, text
+
+
+def _notes_separator(line):
+    """Posição do primeiro ' - ' fora de parênteses, ou -1."""
+    position = line.find(' - ')
+    while position != -1 and line.count('(', 0, position) != line.count(')', 0, position):
+        position = line.find(' - ', position + 1)
+    return position
+
+
+def split_portion(line, portion_pattern=PORTION_PATTERN):
+    """
+    Separa um item das listas high/low em (nome, porção, notas).
+
+    "Nome - notas" usa as notas como porção (um ' - ' entre parênteses faz
+    parte do nome); "Nome, porção" só é separado se a segunda parte parecer
+    uma porção (portion_pattern: números, cup, tbsp, ...).
+    """
+    separator = _notes_separator(line)
+    if separator != -1:
+        notes = line[separator + 3:].strip()
+        return line[:separator].strip(), notes, notes
+
+    if ',' in line:
+        match = _NAME_COMMA_REST.match(line)
+        if match:
+            potential_portion = match.group(2).strip()
+            if portion_pattern.search(potential_portion):
+                return match.group(1).strip(), potential_portion, potential_portion
+
+    return line.strip(), None, None
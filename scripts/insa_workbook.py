@@ -0,0 +1,189 @@
+"""
+Leitor em streaming do ficheiro Excel da tabela INSA (insa_tca.xlsx).
+
+Lê o XML da worksheet diretamente do arquivo .xlsx (zipfile + iterparse),
+produzindo uma linha de cada vez, sem pandas e sem carregar a folha inteira
+em memória. Os valores seguem as mesmas regras que o pandas/openpyxl
+aplicavam: números inteiros como int, decimais como float, texto como str e
+células vazias (ou com marcadores como '' e 'N/A') como NaN.
+"""
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+NAN = float('nan')
+
+# Textos que o pandas.read_excel interpretava como valor em falta
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null',
+])
+
+_CELL_REF = re.compile(r'([A-Z]+)')
+
+
+def _column_index(cell_ref):
+    """Converte a referência de coluna ('A', 'BA', ...) num índice 0-based."""
+    letters = _CELL_REF.match(cell_ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - 64)
+    return index - 1
+
+
+def _cast_number(value):
+    """Converte o texto de uma célula numérica tal como o openpyxl."""
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+def _sheet_paths(archive):
+    """Mapeia o nome de cada sheet para o caminho do XML dentro do arquivo."""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{NS_PKG_REL}Relationship')}
+
+    paths = {}
+    for sheet in workbook.iter(f'{NS_MAIN}sheet'):
+        target = targets[sheet.get(f'{NS_REL}id')]
+        if target.startswith('/'):
+            paths[sheet.get('name')] = target.lstrip('/')
+        else:
+            paths[sheet.get('name')] = posixpath.normpath(posixpath.join('xl', target))
+    return paths
+
+
+def _read_shared_strings(archive):
+    """Lê a tabela de strings partilhadas (ignorando texto fonético)."""
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == f'{NS_MAIN}si':
+                parts = []
+                for child in elem:
+                    if child.tag == f'{NS_MAIN}t':
+                        parts.append(child.text or '')
+                    elif child.tag == f'{NS_MAIN}r':
+                        for t in child.iter(f'{NS_MAIN}t'):
+                            parts.append(t.text or '')
+                strings.append(''.join(parts))
+                elem.clear()
+    return strings
+
+
+def _cell_value(cell, shared_strings):
+    """Extrai o valor Python de um elemento <c>."""
+    cell_type = cell.get('t', 'n')
+
+    if cell_type == 'inlineStr':
+        inline = cell.find(f'{NS_MAIN}is')
+        if inline is None:
+            return NAN
+        text = ''.join(t.text or '' for t in inline.iter(f'{NS_MAIN}t'))
+        return NAN if text in NA_STRINGS else text
+
+    v = cell.find(f'{NS_MAIN}v')
+    if v is None or v.text is None:
+        return NAN
+
+    if cell_type == 's':
+        text = shared_strings[int(v.text)]
+        return NAN if text in NA_STRINGS else text
+    if cell_type == 'b':
+        return v.text == '1'
+    if cell_type == 'n':
+        return _cast_number(v.text)
+    # 'str' (fórmula) e 'e' (erro) ficam como texto
+    return NAN if v.text in NA_STRINGS else v.text
+
+
+def list_sheet_names(excel_file):
+    """Devolve os nomes das sheets do workbook, pela ordem original."""
+    with zipfile.ZipFile(excel_file) as archive:
+        return list(_sheet_paths(archive).keys())
+
+
+def iter_sheet_rows(excel_file, sheet_name):
+    """
+    Percorre as linhas de uma sheet, uma de cada vez.
+
+    Yields:
+        Tuplos (número da linha 1-based, lista de valores). As colunas sem
+        célula ficam como NaN; a lista tem o comprimento da última célula
+        presente na linha.
+    """
+    with zipfile.ZipFile(excel_file) as archive:
+        paths = _sheet_paths(archive)
+        if sheet_name not in paths:
+            raise KeyError(f"Sheet '{sheet_name}' não encontrada. Disponíveis: {list(paths)}")
+
+        shared_strings = _read_shared_strings(archive)
+
+        with archive.open(paths[sheet_name]) as f:
+            row_number = 0
+            for event, elem in ET.iterparse(f, events=('end',)):
+                if elem.tag != f'{NS_MAIN}row':
+                    continue
+
+                row_number = int(elem.get('r', row_number + 1))
+                values = []
+                for position, cell in enumerate(elem.iter(f'{NS_MAIN}c')):
+                    ref = cell.get('r')
+                    index = _column_index(ref) if ref else position
+                    if index >= len(values):
+                        values.extend([NAN] * (index + 1 - len(values)))
+                    values[index] = _cell_value(cell, shared_strings)
+
+                elem.clear()
+                yield row_number, values
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def clean_header(value):
+    """Limpa o nome de uma coluna (espaços nas pontas e quebras de linha)."""
+    return str(value).strip().replace('\n', ' ')
+
+
+def iter_sheet_records(excel_file, sheet_name, header_row=2):
+    """
+    Percorre uma sheet como dicionários {coluna: valor}.
+
+    Args:
+        excel_file: Caminho do ficheiro .xlsx
+        sheet_name: Nome da sheet
+        header_row: Número (1-based) da linha com os headers reais. As linhas
+            anteriores são ignoradas.
+
+    Yields:
+        Um dicionário por linha de dados, saltando linhas totalmente vazias.
+    """
+    headers = None
+
+    for row_number, values in iter_sheet_rows(excel_file, sheet_name):
+        if row_number < header_row:
+            continue
+
+        if headers is None:
+            headers = [clean_header(value) for value in values]
+            continue
+
+        if all(_is_empty(value) for value in values):
+            continue
+
+        if len(values) < len(headers):
+            values.extend([NAN] * (len(headers) - len(values)))
+
+        yield dict(zip(headers, values))
@@ -0,0 +1,75 @@
+"""
+Cache persistente dos resultados do matching da etapa 05.
+
+O resultado de um alimento FODMAP depende apenas de:
+
+- o seu nome normalizado e a categoria FODMAP
+- a tabela portuguesa (impressão digital dos nomes e códigos)
+- as entradas do dicionário de traduções cujas palavras aparecem todas no
+  nome (só essas podem ser encontradas por find_phrases)
+- o código do matcher e os parâmetros (backend, top-k)
+
+A chave da cache combina estes elementos, por isso ao editar algumas
+traduções só os alimentos FODMAP que contêm essas palavras são recalculados.
+A cache fica em BASE_DIR/.match_cache.json e guarda, para cada chave, os
+candidatos como [código, score, tipo].
+"""
+import json
+import os
+
+from build_cache import hash_text
+from text_normalization import normalize_name
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SCRIPTS_DIR)
+MATCH_CACHE_FILE = os.path.join(BASE_DIR, '.match_cache.json')
+
+MATCH_CACHE_VERSION = 1
+
+
+def fingerprint(value):
+    """Hash estável de um valor serializável em JSON."""
+    return hash_text(json.dumps(value, ensure_ascii=False, sort_keys=True))
+
+
+def index_dictionary_entries(dictionary, fold=None):
+    """
+    Agrupa as entradas do dicionário pela primeira palavra da expressão
+    normalizada: palavra -> [(palavras da expressão, expressão, valor)].
+    Com fold, as palavras passam por fold (como em compile_phrase_trie), e
+    as palavras do nome dadas a dictionary_fingerprint() também têm de
+    passar.
+    """
+    by_first_token = {}
+    for phrase, value in dictionary.items():
+        tokens = tuple(fold(token) if fold is not None else token for token in normalize_name(phrase).split())
+        if tokens:
+            by_first_token.setdefault(tokens[0], []).append((tokens, phrase, value))
+    return by_first_token
+
+
+def dictionary_fingerprint(entries_index, name_tokens):
+    """Hash das entradas do dicionário que podem ser encontradas no nome."""
+    token_set = set(name_tokens)
+    relevant = sorted(
+        (phrase, value)
+        for token in token_set
+        for tokens, phrase, value in entries_index.get(token, ())
+        if token_set.issuperset(tokens)
+    )
+    return fingerprint(relevant)
+
+
+def load_match_cache(path=MATCH_CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        cache = json.load(f)
+    if cache.get('version') != MATCH_CACHE_VERSION:
+        return {}
+    return cache.get('entries', {})
+
+
+def save_match_cache(entries, path=MATCH_CACHE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MATCH_CACHE_VERSION, 'entries': entries}, f, ensure_ascii=False)
@@ -0,0 +1,154 @@
+"""
+Índice de n-gramas de caracteres para bloquear candidatos no matching.
+
+Em vez de calcular SequenceMatcher(None, a, b).ratio() contra todos os nomes
+da tabela, o índice devolve apenas os nomes que ainda podem passar o limiar.
+O filtro não perde matches:
+
+- comprimento: ratio = 2*M / (|a| + |b|) com M <= min(|a|, |b|)
+- contagem de trigramas: ratio > limiar implica uma distância de edição
+  d < (|a| + |b|) * (1 - limiar), e duas strings a distância d partilham
+  pelo menos max(|a|, |b|) - n + 1 - n*d n-gramas
+- caracteres em comum: M <= tamanho da interseção dos multiconjuntos de
+  caracteres (o mesmo limite de SequenceMatcher.quick_ratio())
+
+Quando o mínimo de n-gramas partilhados dá <= 0 (nomes curtos), todos os nomes
+com comprimento compatível passam ao filtro de caracteres.
+
+Os candidatos são devolvidos por ordem de posição, para que o resultado
+(incluindo desempates) seja igual ao de percorrer a lista inteira. Um conjunto
+allowed de posições restringe a procura a parte da lista (ex: às categorias
+compatíveis) antes dos filtros mais caros.
+"""
+import math
+from collections import Counter
+
+NGRAM_SIZE = 3
+
+# Margem para erros de vírgula flutuante: na dúvida, aceita-se o candidato
+_EPSILON = 1e-9
+
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    """Multiconjunto dos n-gramas de caracteres de um texto."""
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def build_ngram_index(texts, n=NGRAM_SIZE):
+    """
+    Constrói o índice sobre uma lista de textos (ex: 'normalized_main').
+
+    Returns:
+        Dicionário com os textos, as listas de n-gramas (n-grama ->
+        [(posição, contagem)]), as posições por comprimento e por texto.
+    """
+    texts = list(texts)
+    postings = {}
+    by_length = {}
+    by_text = {}
+    char_counts = []
+
+    for position, text in enumerate(texts):
+        for gram, count in char_ngrams(text, n).items():
+            postings.setdefault(gram, []).append((position, count))
+        by_length.setdefault(len(text), []).append(position)
+        by_text.setdefault(text, []).append(position)
+        char_counts.append(Counter(text))
+
+    return {
+        'n': n,
+        'texts': texts,
+        'postings': postings,
+        'by_length': by_length,
+        'by_text': by_text,
+        'char_counts': char_counts,
+    }
+
+
+def similar_candidates(index, query, threshold, allowed=None, stats=None):
+    """
+    Posições dos textos cujo SequenceMatcher.ratio() com query pode ser
+    maior do que threshold (só entre as posições allowed, se indicadas).
+
+    Se stats for um dicionário, guarda em stats['blocked'] o número de
+    candidatos que passaram o filtro de comprimento/n-gramas, antes do filtro
+    pelos caracteres em comum.
+    """
+    n = index['n']
+    texts = index['texts']
+    query_length = len(query)
+
+    # Mínimo de n-gramas partilhados, por comprimento compatível
+    required_by_length = {}
+    candidates = set()
+
+    for length, positions in index['by_length'].items():
+        total = query_length + length
+        if total == 0 or 2 * min(query_length, length) / total <= threshold - _EPSILON:
+            continue
+        max_distance = math.ceil(total * (1 - threshold) + _EPSILON) - 1
+        required = max(query_length, length) - n + 1 - n * max_distance
+        if required <= 0:
+            candidates.update(positions)
+        else:
+            required_by_length[length] = required
+
+    if required_by_length:
+        shared = Counter()
+        postings = index['postings']
+        for gram, query_count in char_ngrams(query, n).items():
+            for position, count in postings.get(gram, ()):
+                shared[position] += min(query_count, count)
+
+        for position, count in shared.items():
+            required = required_by_length.get(len(texts[position]))
+            if required is not None and count >= required:
+                candidates.add(position)
+    
+    if allowed is not None:
+        candidates &= allowed
+    if stats is not None:
+        stats['blocked'] = len(candidates)
+
+    # Limite pelos caracteres em comum
+    query_chars = Counter(query)
+    char_counts = index['char_counts']
+    return sorted(
+        position for position in candidates
+        if 2 * sum((query_chars & char_counts[position]).values())
+        / (query_length + len(texts[position])) > threshold - _EPSILON
+    )
+
+
+def containment_candidates(index, query, allowed=None):
+    """Posições dos textos t com query in t ou t in query (entre allowed)."""
+    n = index['n']
+    texts = index['texts']
+    by_text = index['by_text']
+    candidates = set()
+
+    # t in query: t é uma das substrings de query
+    query_length = len(query)
+    for start in range(query_length + 1):
+        for end in range(start, query_length + 1):
+            positions = by_text.get(query[start:end])
+            if positions:
+                candidates.update(positions)
+
+    # query in t: t contém todos os n-gramas de query
+    if query_length < n:
+        candidates.update(i for i, text in enumerate(texts) if query in text)
+    else:
+        postings = index['postings']
+        grams = sorted(char_ngrams(query, n), key=lambda g: len(postings.get(g, ())))
+        common = None
+        for gram in grams:
+            positions = {position for position, _ in postings.get(gram, ())}
+            common = positions if common is None else common & positions
+            if not common:
+                break
+        candidates.update(i for i in common or () if query in texts[i])
+
+    if allowed is not None:
+        candidates &= allowed
+    return sorted(candidates)
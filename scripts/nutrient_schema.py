@@ -0,0 +1,151 @@
+"""
+Especificação declarativa das colunas da tabela nutricional.
+
+Cada campo nutricional é descrito uma única vez: coluna de origem no Excel
+INSA, chave no banco de dados, unidade e grupo ('energy', 'macronutrients',
+'vitamins' ou 'minerals'). A partir desta especificação são compilados:
+
+- o formatador da etapa 02 (linha INSA -> registo formatado, com valores
+  numéricos)
+- o construtor do bloco 'nutrition' das etapas 06 e 07
+
+Os valores são guardados como números (float); a unidade de cada campo está
+em NUTRIENT_UNITS, que é copiada para os metadados do banco de dados
+unificado ('nutrient_units').
+"""
+
+# Campos de identificação: (coluna de origem, chave)
+INFO_COLUMNS = [
+    ('Cod', 'code'),
+    ('Nome do alimento', 'name'),
+    ('Nível 1', 'category_level_1'),
+    ('Nível 2', 'category_level_2'),
+    ('Nível 3', 'category_level_3'),
+]
+
+# Campos nutricionais: (coluna de origem, chave, unidade, grupo)
+NUTRIENT_COLUMNS = [
+    # Energia
+    ('Energia [kcal]', 'energy_kcal', 'kcal', 'energy'),
+    ('Energia [kJ]', 'energy_kj', 'kJ', 'energy'),
+
+    # Macronutrientes - Lípidos
+    ('Lípidos [g]', 'lipids_g', 'g', 'macronutrients'),
+    ('Ácidos gordos saturados [g]', 'saturated_fatty_acids_g', 'g', 'macronutrients'),
+    ('Ácidos gordos monoinsaturados  [g]', 'monounsaturated_fatty_acids_g', 'g', 'macronutrients'),
+    ('Ácidos gordos polinsaturados  [g]', 'polyunsaturated_fatty_acids_g', 'g', 'macronutrients'),
+    ('Ácido linoleico  [g]', 'linoleic_acid_g', 'g', 'macronutrients'),
+    ('Ácidos gordos trans  [g]', 'trans_fatty_acids_g', 'g', 'macronutrients'),
+    ('Colesterol  [mg]', 'cholesterol_mg', 'mg', 'macronutrients'),
+
+    # Macronutrientes - Hidratos de Carbono
+    ('Hidratos de carbono  [g]', 'carbohydrates_g', 'g', 'macronutrients'),
+    ('Açúcares  [g]', 'sugars_g', 'g', 'macronutrients'),
+    ('Oligossacáridos  [g]', 'oligosaccharides_g', 'g', 'macronutrients'),
+    ('Amido  [g]', 'starch_g', 'g', 'macronutrients'),
+
+    # Outros Macronutrientes
+    ('Proteínas  [g]', 'protein_g', 'g', 'macronutrients'),
+    ('Fibra   [g]', 'fiber_g', 'g', 'macronutrients'),
+    ('Sal   [g]', 'salt_g', 'g', 'macronutrients'),
+    ('Álcool  [g]', 'alcohol_g', 'g', 'macronutrients'),
+    ('Água  [g]', 'water_g', 'g', 'macronutrients'),
+    ('Ácidos orgânicos  [g]', 'organic_acids_g', 'g', 'macronutrients'),
+    ('Cinza  [g]', 'ash_g', 'g', 'macronutrients'),
+
+    # Vitaminas Lipossolúveis
+    ('Vitamina A   [µg]', 'vitamin_a_ug', 'µg', 'vitamins'),
+    ('Caroteno  [µg]', 'carotene_ug', 'µg', 'vitamins'),
+    ('alpha-caroteno [µg]', 'alpha_carotene_ug', 'µg', 'vitamins'),
+    ('beta-caroteno, total [µg]', 'beta_carotene_ug', 'µg', 'vitamins'),
+    ('beta-criptoxantina [µg]', 'beta_cryptoxanthin_ug', 'µg', 'vitamins'),
+    ('Licopeno [µg]', 'lycopene_ug', 'µg', 'vitamins'),
+    ('Luteína [µg]', 'lutein_ug', 'µg', 'vitamins'),
+    ('Zeaxantina [µg]', 'zeaxanthin_ug', 'µg', 'vitamins'),
+    ('Vitamina D  [µg]', 'vitamin_d_ug', 'µg', 'vitamins'),
+    ('alfa-tocoferol  [mg]', 'alpha_tocopherol_mg', 'mg', 'vitamins'),
+
+    # Vitaminas Hidrossolúveis
+    ('Tiamina  [mg]', 'thiamin_mg', 'mg', 'vitamins'),
+    ('Riboflavina  [mg]', 'riboflavin_mg', 'mg', 'vitamins'),
+    ('Niacina  [mg]', 'niacin_mg', 'mg', 'vitamins'),
+    ('Equivalentes de niacina  [mg]', 'niacin_equivalents_mg', 'mg', 'vitamins'),
+    ('Triptofano/60  [mg]', 'tryptophan_60_mg', 'mg', 'vitamins'),
+    ('Vitamina B6  [mg]', 'vitamin_b6_mg', 'mg', 'vitamins'),
+    ('Vitamina B12  [µg]', 'vitamin_b12_ug', 'µg', 'vitamins'),
+    ('Vitamina C  [mg]', 'vitamin_c_mg', 'mg', 'vitamins'),
+    ('Folatos  [µg]', 'folates_ug', 'µg', 'vitamins'),
+
+    # Minerais
+    ('Sódio  [mg]', 'sodium_mg', 'mg', 'minerals'),
+    ('Potássio  [mg]', 'potassium_mg', 'mg', 'minerals'),
+    ('Cálcio  [mg]', 'calcium_mg', 'mg', 'minerals'),
+    ('Fósforo  [mg]', 'phosphorus_mg', 'mg', 'minerals'),
+    ('Magnésio  [mg]', 'magnesium_mg', 'mg', 'minerals'),
+    ('Ferro  [mg]', 'iron_mg', 'mg', 'minerals'),
+    ('Zinco  [mg]', 'zinc_mg', 'mg', 'minerals'),
+    ('Selénio  [µg]', 'selenium_ug', 'µg', 'minerals'),
+    ('Iodo  [µg]', 'iodine_ug', 'µg', 'minerals'),
+]
+
+# Grupo cujos campos ficam no topo do bloco 'nutrition' (não aninhados)
+TOP_LEVEL_GROUP = 'energy'
+
+NUTRIENT_UNITS = {key: unit for _, key, unit, _ in NUTRIENT_COLUMNS}
+
+
+def to_number(value):
+    """Converte um valor da tabela INSA em float (None para vazio/NaN)."""
+    if value is None or value != value:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def compile_row_formatter(info_columns=INFO_COLUMNS, nutrient_columns=NUTRIENT_COLUMNS):
+    """
+    Compila a especificação num formatador de linhas INSA.
+
+    Returns:
+        Tuplo (format_row, format_rows): format_row formata uma linha e
+        format_rows formata uma lista de linhas de uma vez.
+    """
+    info_pairs = tuple((source, key) for source, key in info_columns)
+    numeric_pairs = tuple((source, key) for source, key, _, _ in nutrient_columns)
+
+    def format_row(row):
+        get = row.get
+        formatted = {key: get(source) for source, key in info_pairs}
+        for source, key in numeric_pairs:
+            formatted[key] = to_number(get(source))
+        return formatted
+
+    def format_rows(rows):
+        return [format_row(row) for row in rows]
+
+    return format_row, format_rows
+
+
+def compile_nutrition_builder(nutrient_columns=NUTRIENT_COLUMNS):
+    """
+    Compila a especificação no construtor do bloco 'nutrition' do banco de
+    dados unificado (energia no topo, restantes campos agrupados).
+    """
+    top_keys = tuple(key for _, key, _, group in nutrient_columns if group == TOP_LEVEL_GROUP)
+
+    groups = {}
+    for _, key, _, group in nutrient_columns:
+        if group != TOP_LEVEL_GROUP:
+            groups.setdefault(group, []).append(key)
+    grouped_keys = tuple((group, tuple(keys)) for group, keys in groups.items())
+
+    def build_nutrition(food):
+        get = food.get
+        nutrition = {key: get(key) for key in top_keys}
+        for group, keys in grouped_keys:
+            nutrition[group] = {key: get(key) for key in keys}
+        return nutrition
+
+    return build_nutrition
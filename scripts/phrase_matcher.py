@@ -0,0 +1,80 @@
+"""
+Procura de expressões de várias palavras num nome, numa só passagem.
+
+Um dicionário expressão -> valor (ex: 'sweet potato' -> 'batata-doce') é
+compilado numa trie de palavras. find_phrases percorre os tokens do nome uma
+vez e devolve as ocorrências mais à esquerda e mais longas, sem sobreposição:
+em 'sweet potato mash' encontra 'sweet potato' e não 'potato'.
+
+Como a trie trabalha sobre palavras inteiras, 'pea' nunca casa dentro de
+'peach'. Com uma função fold (ex: text_normalization.english_singular), as
+palavras das expressões e do nome são comparadas depois de fold, para
+'brussels sprout' casar em 'brussels sprouts'.
+"""
+from text_normalization import normalize_name
+
+_VALUE = object()
+_FOLD = object()
+
+
+def compile_phrase_trie(phrases, fold=None):
+    """
+    Compila um dicionário expressão -> valor numa trie de palavras.
+
+    As expressões são normalizadas com normalize_name ('semi-skimmed' passa
+    a 'semi skimmed') e, com fold, cada palavra passa por fold; a trie guarda
+    fold para find_phrases() o aplicar também às palavras do nome. Se duas
+    expressões ficarem iguais, vale a última, tal como num dicionário.
+    """
+    trie = {_FOLD: fold}
+    for phrase, value in phrases.items():
+        tokens = normalize_name(phrase).split()
+        if not tokens:
+            continue
+        if fold is not None:
+            tokens = [fold(token) for token in tokens]
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_VALUE] = value
+    return trie
+
+
+def find_phrases(trie, tokens):
+    """
+    Ocorrências mais à esquerda e mais longas das expressões da trie.
+
+    Args:
+        trie: Trie criada por compile_phrase_trie()
+        tokens: Lista de palavras do nome (já normalizado)
+
+    Returns:
+        Lista de (início, fim, valor), com fim exclusivo, pela ordem do nome
+    """
+    fold = trie[_FOLD]
+    if fold is not None:
+        tokens = [fold(token) for token in tokens]
+
+    matches = []
+    start = 0
+    total = len(tokens)
+
+    while start < total:
+        node = trie
+        longest = None
+        position = start
+        while position < total:
+            node = node.get(tokens[position])
+            if node is None:
+                break
+            position += 1
+            if _VALUE in node:
+                longest = (start, position, node[_VALUE])
+
+        if longest is None:
+            start += 1
+        else:
+            matches.append(longest)
+            start = longest[1]
+
+    return matches
@@ -0,0 +1,148 @@
+"""
+Interpretação das notas de porção das listas FODMAP.
+
+Converte texto como "over 1/2 cup", "up to 2 tbsp", "1/4 cup / 45g" ou
+"1 slice" em campos numéricos:
+
+    {'comparator': '>', 'quantity': 0.5, 'unit': 'cup', 'grams': 120.0}
+
+- comparator: '<=' ("up to"), '<' ("less than"), '>' ("over", "more than",
+  "greater than"). Sem comparador no texto, a nota é a porção testada: na
+  lista low ("1/2 cup") é o máximo seguro, por isso fica '<='; nas outras
+  listas fica '='
+- quantity / unit: primeira quantidade da nota e a sua unidade, sempre na
+  forma canónica: as medidas passam por UNIT_ALIASES ("2 tablespoons" e
+  "2 tbsp" dão 'tbsp', "1 cup" e "2 cups" dão 'cup') e as unidades de
+  contagem ficam no singular ("2 biscuits" dá 'biscuit', "10 cherries" dá
+  'cherry'). Palavras de tamanho ("1 medium", "2 small") descrevem o
+  alimento e não são unidades: a unidade é a palavra seguinte, se houver
+  ("5 medium strawberries" dá 'strawberry')
+- grams: equivalente em gramas. Se a nota indicar uma massa (ex: "/ 45g"),
+  é essa que conta; caso contrário converte-se a unidade pela tabela
+  GRAMS_PER_UNIT. Volumes assumem densidade 1 (1 ml = 1 g), por isso são
+  aproximações. Unidades de contagem (slice, biscuit, ...) ficam com
+  grams None.
+
+Notas sem quantidade ("avoid entirely if possible") devolvem None.
+"""
+import re
+
+from text_normalization import english_singular
+
+# Aliases -> unidade canónica
+UNIT_ALIASES = {
+    'g': 'g', 'gram': 'g', 'grams': 'g',
+    'kg': 'kg',
+    'oz': 'oz',
+    'ml': 'ml',
+    'l': 'l',
+    'cup': 'cup', 'cups': 'cup',
+    'tbsp': 'tbsp', 'tablespoon': 'tbsp', 'tablespoons': 'tbsp',
+    'tsp': 'tsp', 'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'glass': 'glass', 'glasses': 'glass',
+    # Contagem com plural irregular (as restantes passam por english_singular)
+    'halves': 'half',
+}
+
+# Gramas por unidade (volumes com densidade 1)
+GRAMS_PER_UNIT = {
+    'g': 1.0,
+    'kg': 1000.0,
+    'oz': 28.35,
+    'ml': 1.0,
+    'l': 1000.0,
+    'cup': 240.0,
+    'tbsp': 15.0,
+    'tsp': 5.0,
+    'glass': 250.0,
+}
+
+MASS_UNITS = {'g', 'kg', 'oz'}
+
+COMPARATORS = {
+    'up to': '<=',
+    'less than': '<',
+    'over': '>',
+    'more than': '>',
+    'greater than': '>',
+}
+
+NUMBER_WORDS = {'one': 1.0, 'two': 2.0, 'three': 3.0, 'half': 0.5}
+
+# Palavras de tamanho entre a quantidade e a unidade
+SIZE_WORDS = ('small', 'medium', 'large')
+
+# Comparador de uma porção testada sem comparador no texto, por nível FODMAP
+BARE_SERVING_COMPARATORS = {'low': '<='}
+
+_COMPARATOR = re.compile(r'\b(' + '|'.join(COMPARATORS) + r')\b', re.IGNORECASE)
+
+# Quantidade (fração, decimal ou número por extenso) seguida de unidade
+# opcional. Percentagens e intervalos ("50-100%") não contam.
+_QUANTITY = re.compile(
+    r'(?<![\w.])(\d+\s*/\s*\d+|\d+(?:\.\d+)?|' + '|'.join(NUMBER_WORDS) + r')'
+    r'(?![\d.]|\s*[-%])'
+    r'(?:\s*(?:a\s+)?(?:(?:' + '|'.join(SIZE_WORDS) + r')\s+)?([a-z]+))?',
+    re.IGNORECASE,
+)
+
+
+def _to_number(text):
+    text = text.lower()
+    if text in NUMBER_WORDS:
+        return NUMBER_WORDS[text]
+    if '/' in text:
+        numerator, denominator = text.split('/')
+        return float(numerator) / float(denominator)
+    return float(text)
+
+
+def _to_grams(quantity, unit):
+    factor = GRAMS_PER_UNIT.get(unit)
+    if factor is None:
+        return None
+    return round(quantity * factor, 1)
+
+
+def parse_portion(note, fodmap_level=None):
+    """
+    Converte uma nota de porção em campos numéricos. fodmap_level é a lista
+    de onde vem a nota e decide o comparador de uma porção simples.
+
+    Returns:
+        Dicionário com comparator, quantity, unit e grams, ou None se a nota
+        não tiver nenhuma quantidade.
+    """
+    if not note:
+        return None
+
+    amounts = []
+    for match in _QUANTITY.finditer(note):
+        unit = match.group(2)
+        if unit is not None:
+            unit = unit.lower()
+            unit = None if unit in SIZE_WORDS else UNIT_ALIASES.get(unit) or english_singular(unit)
+        amounts.append((_to_number(match.group(1)), unit))
+
+    if not amounts:
+        return None
+
+    quantity, unit = amounts[0]
+
+    # Uma massa explícita ("1/4 cup / 45g") vale mais do que a conversão
+    grams = next((_to_grams(q, u) for q, u in amounts if u in MASS_UNITS), None)
+    if grams is None:
+        grams = _to_grams(quantity, unit)
+
+    comparator_match = _COMPARATOR.search(note)
+    if comparator_match:
+        comparator = COMPARATORS[comparator_match.group(1).lower()]
+    else:
+        comparator = BARE_SERVING_COMPARATORS.get(fodmap_level, '=')
+
+    return {
+        'comparator': comparator,
+        'quantity': round(quantity, 3),
+        'unit': unit,
+        'grams': grams,
+    }
@@ -0,0 +1,198 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from build_cache import (
+    load_manifest, save_manifest, stage_key, is_up_to_date, record_stage
+)
+
+# Diretório base
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(BASE_DIR, 'scripts')
+RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+
+# Etapas do pipeline, pela ordem de execução
+STAGES = [
+    {
+        'id': '01',
+        'script': '01_extract_nutrition_data.py',
+        'inputs': [os.path.join(RAW_DATA_DIR, 'insa_tca.xlsx')],
+        'outputs': [os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json')],
+        'params': [],
+    },
+    {
+        'id': '02',
+        'script': '02_format_for_database.py',
+        'inputs': [os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json')],
+        'outputs': [os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json')],
+        'params': [],
+    },
+    {
+        'id': '03',
+        'script': '03_extract_portuguese_names.py',
+        'inputs': [os.path.join(RAW_DATA_DIR, 'tabela_alimentar_portugal.json')],
+        'outputs': [
+            os.path.join(RAW_DATA_DIR, 'portuguese_food_names.json'),
+            os.path.join(RAW_DATA_DIR, 'portuguese_food_names_simple.json'),
+        ],
+        'params': [],
+    },
+    {
+        'id': '04',
+        'script': '04_process_fodmap_data.py',
+        'inputs': [
+            os.path.join(RAW_DATA_DIR, 'high_fodmap.txt'),
+            os.path.join(RAW_DATA_DIR, 'low_fodmap.txt'),
+            os.path.join(RAW_DATA_DIR, 'free_fodmap.txt'),
+            os.path.join(RAW_DATA_DIR, 'foodmap_pt.txt'),
+        ],
+        'outputs': [
+            os.path.join(OUTPUT_DIR, 'fodmap_database.json'),
+            os.path.join(OUTPUT_DIR, 'fodmap_database_pt.json'),
+        ],
+        'params': [],
+    },
+    {
+        'id': '05',
+        'script': '05_create_equivalences.py',
+        'inputs': [
+            os.path.join(OUTPUT_DIR, 'fodmap_database.json'),
+            os.path.join(OUTPUT_DIR, 'fodmap_database_pt.json'),
+            os.path.join(RAW_DATA_DIR, 'portuguese_food_names.json'),
+        ],
+        'outputs': [
+            os.path.join(OUTPUT_DIR, 'fodmap_portuguese_equivalences.json'),
+            os.path.join(OUTPUT_DIR, 'fodmap_equivalences_review.json'),
+        ],
+        'params': [],
+    },
+    {
+        'id': '06',
+        'script': '06_create_unified_database.py',
+        'inputs': [
+            os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json'),
+            os.path.join(OUTPUT_DIR, 'fodmap_portuguese_equivalences.json'),
+            os.path.join(OUTPUT_DIR, 'fodmap_database.json'),
+        ],
+        'outputs': [os.path.join(OUTPUT_DIR, 'unified_food_database.json')],
+        'params': [],
+    },
+    {
+        'id': '07',
+        'script': '07_create_enhanced_unified_database.py',
+        'inputs': [
+            os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json'),
+            os.path.join(OUTPUT_DIR, 'fodmap_database.json'),
+        ],
+        'outputs': [os.path.join(OUTPUT_DIR, 'unified_food_database.json')],
+        'params': [],
+    },
+]
+
+
+def pipeline_stages(fuse_format=False):
+    """
+    Devolve as etapas a executar. Com fuse_format=True, a etapa 01 gera
+    também a tabela formatada (01 --format) e a etapa 02 deixa de ser
+    necessária.
+    """
+    if not fuse_format:
+        return STAGES
+
+    stages = []
+    for stage in STAGES:
+        if stage['id'] == '02':
+            continue
+        if stage['id'] == '01':
+            stage = dict(stage)
+            stage['params'] = stage['params'] + ['--format']
+            stage['outputs'] = stage['outputs'] + [os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json')]
+        stages.append(stage)
+    return stages
+
+
+def run_pipeline(selected=None, force=False, dry_run=False, fuse_format=False):
+    """
+    Executa as etapas do pipeline, saltando as que não mudaram.
+
+    Args:
+        selected: IDs das etapas a considerar (None = todas)
+        force: Executar mesmo que a cache diga que a etapa está atualizada
+        dry_run: Apenas mostrar o que seria executado
+        fuse_format: Formatar a tabela na etapa 01, sem passar pelo JSON bruto
+    """
+    manifest = load_manifest()
+    stages = pipeline_stages(fuse_format)
+    stage_order = [stage['id'] for stage in stages]
+
+    executed = 0
+    skipped = 0
+
+    for stage in stages:
+        if selected and stage['id'] not in selected:
+            continue
+
+        script_path = os.path.join(SCRIPTS_DIR, stage['script'])
+
+        missing = [p for p in stage['inputs'] if not os.path.exists(p)]
+        if missing:
+            if dry_run:
+                print(f"▶ {stage['script']}: entradas ainda por gerar")
+                executed += 1
+                continue
+            print(f"✗ {stage['script']}: entradas em falta: {missing}")
+            sys.exit(1)
+
+        key, detail = stage_key(stage['inputs'], script_path, stage['params'])
+
+        if not force and is_up_to_date(manifest, stage['id'], key, stage['outputs'], stage_order):
+            print(f"✓ {stage['script']}: sem alterações, a reutilizar saída em cache")
+            skipped += 1
+            continue
+
+        if dry_run:
+            print(f"▶ {stage['script']}: seria executado")
+            executed += 1
+            continue
+
+        print(f"▶ {stage['script']}...")
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, script_path] + stage['params'],
+            cwd=SCRIPTS_DIR,
+            stdout=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            print(f"✗ {stage['script']} falhou (código {result.returncode})")
+            save_manifest(manifest)
+            sys.exit(result.returncode)
+
+        record_stage(manifest, stage['id'], key, detail, stage['outputs'])
+        save_manifest(manifest)
+        executed += 1
+        print(f"  concluído em {time.perf_counter() - start:.1f}s")
+
+    print(f"\n📊 Etapas executadas: {executed} | Reutilizadas da cache: {skipped}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Executa o pipeline com cache por hash de conteúdo.')
+    parser.add_argument('--stages', nargs='+', metavar='ID',
+                        help='Etapas a considerar (ex: 05 06 07). Por omissão, todas.')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignorar a cache e executar todas as etapas selecionadas')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Mostrar o que seria executado sem executar')
+    parser.add_argument('--fuse-format', action='store_true',
+                        help='Gerar a tabela formatada diretamente na etapa 01 (sem a etapa 02)')
+    args = parser.parse_args()
+
+    run_pipeline(selected=args.stages, force=args.force, dry_run=args.dry_run,
+                 fuse_format=args.fuse_format)
+
+
+if __name__ == "__main__":
+    main()
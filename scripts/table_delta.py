@@ -0,0 +1,116 @@
+"""
+Delta entre versões da tabela INSA, por código de alimento ('Cod').
+
+A etapa 01 (com --delta) compara o workbook novo com a tabela extraída
+anteriormente e grava raw-data/tabela_alimentar_delta.json com as linhas
+adicionadas, removidas e alteradas. As etapas 02, 03, 05 e 07 (também com
+--delta) processam apenas essas linhas e reaproveitam o resto das suas saídas
+anteriores.
+"""
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
+DELTA_FILE = os.path.join(RAW_DATA_DIR, 'tabela_alimentar_delta.json')
+
+
+def _fingerprint(row):
+    # json.dumps compara NaN corretamente (NaN != NaN em Python)
+    return json.dumps(row, ensure_ascii=False)
+
+
+def new_delta(source, sheet_name, previous_total):
+    """Cria uma estrutura de delta vazia."""
+    return {
+        'metadata': {
+            'source_workbook': source,
+            'sheet': sheet_name,
+            'previous_total': previous_total,
+        },
+        'order': [],
+        'added': [],
+        'changed': [],
+        'removed': [],
+    }
+
+
+def track_changes(records, previous_rows, delta):
+    """
+    Compara cada registo novo com a versão anterior, sem interromper o
+    streaming: os registos são devolvidos tal como chegam e o delta é
+    preenchido à medida. As remoções ficam conhecidas quando o iterador acaba.
+
+    Args:
+        records: Iterador de registos da tabela nova
+        previous_rows: Lista de registos da tabela anterior
+        delta: Estrutura criada por new_delta()
+    """
+    previous_by_code = {row.get('Cod'): _fingerprint(row) for row in previous_rows}
+
+    for record in records:
+        code = record.get('Cod')
+        delta['order'].append(code)
+
+        previous = previous_by_code.pop(code, None)
+        if previous is None:
+            delta['added'].append(record)
+        elif previous != _fingerprint(record):
+            delta['changed'].append(record)
+
+        yield record
+
+    delta['removed'] = list(previous_by_code.keys())
+    delta['metadata'].update({
+        'total': len(delta['order']),
+        'added': len(delta['added']),
+        'changed': len(delta['changed']),
+        'removed': len(delta['removed']),
+        'unchanged': len(delta['order']) - len(delta['added']) - len(delta['changed']),
+    })
+
+
+def save_delta(delta, path=DELTA_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, ensure_ascii=False, indent=2)
+
+
+def load_delta(path=DELTA_FILE):
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} não existe. Execute primeiro: python 01_extract_nutrition_data.py --delta"
+        )
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def updated_rows(delta):
+    """Linhas novas ou alteradas, por código."""
+    return {row.get('Cod'): row for row in delta['added'] + delta['changed']}
+
+
+def touched_codes(delta):
+    """Códigos cujas linhas anteriores deixaram de ser válidas."""
+    return set(delta['removed']) | {row.get('Cod') for row in delta['changed']}
+
+
+def apply_delta(previous_items, delta, build_item, key='code'):
+    """
+    Reconstrói uma saída por linha da tabela aplicando o delta.
+
+    As linhas novas ou alteradas passam por build_item(row); as restantes são
+    reaproveitadas de previous_items. A ordem segue a da tabela nova.
+    build_item pode devolver None para omitir uma linha.
+    """
+    previous_by_key = {item[key]: item for item in previous_items}
+    updated = updated_rows(delta)
+
+    result = []
+    for code in delta['order']:
+        if code in updated:
+            item = build_item(updated[code])
+        else:
+            item = previous_by_key.get(code)
+        if item is not None:
+            result.append(item)
+    return result
@@ -0,0 +1,66 @@
+"""
+Joins por chave entre as fontes do pipeline (tabela nutricional, base FODMAP,
+equivalências).
+
+Cada fonte é indexada uma única vez num dicionário chave -> registos, e o
+join percorre a outra fonte fazendo uma procura por registo, pelo que o custo
+é linear no tamanho das duas fontes (em vez de uma pesquisa linear por match).
+
+A chave é o nome de um campo, um tuplo de campos (chave composta) ou uma
+função registo -> chave. index_by() guarda todos os registos de cada chave,
+pela ordem de entrada, para joins um-para-muitos; index_unique() é para
+chaves que identificam um único registo (ex: o código INSA, o 'id' FODMAP).
+left_join() indexa o lado direito com index_unique(), por isso uma chave
+repetida nesse lado é um erro e não multiplica as linhas do lado esquerdo.
+"""
+from operator import itemgetter
+
+
+def key_function(key):
+    """Converte um campo, tuplo de campos ou função numa função de chave."""
+    if callable(key):
+        return key
+    if isinstance(key, tuple):
+        return itemgetter(*key)
+    return itemgetter(key)
+
+
+def index_by(rows, key):
+    """Índice chave -> lista de registos (pela ordem de rows)."""
+    get_key = key_function(key)
+    index = {}
+    for row in rows:
+        index.setdefault(get_key(row), []).append(row)
+    return index
+
+
+def index_unique(rows, key):
+    """
+    Índice chave -> registo, para chaves únicas.
+
+    Raises:
+        ValueError: Se dois registos tiverem a mesma chave
+    """
+    get_key = key_function(key)
+    index = {}
+    for row in rows:
+        row_key = get_key(row)
+        if row_key in index:
+            raise ValueError(f"Chave duplicada: {row_key!r}")
+        index[row_key] = row
+    return index
+
+
+def left_join(rows, key, right_rows, right_key):
+    """
+    Devolve (registo, correspondência) para cada registo de rows, pela mesma
+    ordem. A correspondência é o registo de right_rows com a mesma chave, ou
+    None.
+
+    Raises:
+        ValueError: Se dois registos de right_rows tiverem a mesma chave
+    """
+    get_key = key_function(key)
+    index = index_unique(right_rows, right_key)
+    for row in rows:
+        yield row, index.get(get_key(row))
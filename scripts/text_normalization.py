@@ -0,0 +1,154 @@
+"""
+Normalização de nomes de alimentos, partilhada por todas as etapas.
+
+Antes cada etapa (03, 04, 05 e 07) tinha a sua própria versão, com mapas de
+acentos e pontuação ligeiramente diferentes: por exemplo, 'Alho-francês'
+ficava 'alho-frances' na 03 mas a tradução 'alho-francês' ficava
+'alho frances' na 05, e as duas nunca faziam match. Agora há uma única regra:
+
+1. minúsculas
+2. remoção de acentos (decomposição NFKD) e pontuação (, / : ; . -) -> espaço,
+   numa só chamada a str.translate com uma tabela pré-calculada
+3. remoção de conteúdo entre parênteses
+4. espaços múltiplos -> um espaço
+
+Os resultados ficam em cache (LRU), porque os mesmos nomes e traduções são
+normalizados muitas vezes durante o matching.
+
+name_key() reduz um nome português já normalizado a uma chave para procura
+direta (sem palavras vazias, cada palavra no singular), para 'Cebolas' e
+'Cebola crua', ou 'Pão, trigo' e 'Pão de trigo', terem chaves comparáveis.
+plural_forms() faz o caminho inverso, para procurar uma palavra-chave no
+singular também nas suas formas do plural.
+
+english_singular() faz o mesmo para palavras inglesas ('potatoes' ->
+'potato', 'berries' -> 'berry'), para as expressões do dicionário de
+traduções casarem tanto no singular como no plural.
+
+compound_words() separa um nome nas palavras de normalize_name(), mas mantém
+as palavras compostas com hífen numa só ('Alho-francês cru' ->
+('alho-frances', 'cru')), para quem procura palavras inteiras não encontrar
+'alho' no alho-francês.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Pontuação tratada como separador de palavras
+PUNCTUATION = ',/:;.-'
+
+
+def _build_translate_table():
+    table = {}
+
+    # Letras latinas acentuadas (Latin-1 Supplement e Latin Extended-A/B)
+    for code in range(0xC0, 0x250):
+        char = chr(code)
+        decomposed = unicodedata.normalize('NFKD', char)
+        base = ''.join(c for c in decomposed if not unicodedata.combining(c))
+        if base != char and base.isascii():
+            table[code] = base.lower()
+
+    for char in PUNCTUATION:
+        table[ord(char)] = ' '
+
+    return table
+
+
+_TRANSLATE_TABLE = _build_translate_table()
+_COMPOUND_TRANSLATE_TABLE = {code: char for code, char in _TRANSLATE_TABLE.items() if code != ord('-')}
+_PARENTHESES = re.compile(r'\([^)]*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Palavras ignoradas nas chaves de nomes portugueses
+PORTUGUESE_STOPWORDS = frozenset(['a', 'o', 'as', 'os', 'ao', 'e', 'de', 'do', 'da', 'dos', 'das',
+                                  'em', 'no', 'na', 'com', 'tipo', 'ex'])
+
+# Terminações do plural -> singular (sem acentos), pela ordem em que são tentadas
+_PLURAL_ENDINGS = (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+                   ('res', 'r'), ('zes', 'z'), ('ns', 'm'), ('s', ''))
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name):
+    """Normaliza o nome de um alimento para matching."""
+    if not name:
+        return ""
+    name = name.lower().translate(_TRANSLATE_TABLE)
+    name = _PARENTHESES.sub('', name)
+    name = _WHITESPACE.sub(' ', name)
+    return name.strip()
+
+
+@lru_cache(maxsize=65536)
+def compound_words(name):
+    """
+    Palavras do nome normalizado, com cada palavra composta ('couve-flor',
+    'couve-de-bruxelas') numa só. Hífenes soltos ('infusão - bica') separam
+    palavras.
+    """
+    if not name:
+        return ()
+    name = name.lower().translate(_COMPOUND_TRANSLATE_TABLE)
+    name = _PARENTHESES.sub('', name)
+    return tuple(word for word in (part.strip('-') for part in name.split()) if word)
+
+
+@lru_cache(maxsize=65536)
+def fold_accents(text):
+    """Remove acentos e passa a minúsculas, sem mexer na pontuação."""
+    if not text:
+        return ""
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', text.lower())
+        if not unicodedata.combining(c)
+    )
+
+
+@lru_cache(maxsize=65536)
+def singular(word):
+    """Singular aproximado de uma palavra portuguesa normalizada."""
+    if len(word) <= 3:
+        return word
+    for ending, replacement in _PLURAL_ENDINGS:
+        if word.endswith(ending):
+            return word[:-len(ending)] + replacement
+    return word
+
+
+# Terminações do plural inglês -> singular, pela ordem em que são tentadas
+_ENGLISH_PLURAL_ENDINGS = (('ies', 'y'), ('oes', 'o'), ('ches', 'ch'), ('shes', 'sh'), ('sses', 'ss'),
+                           ('xes', 'x'), ('s', ''))
+
+
+@lru_cache(maxsize=65536)
+def english_singular(word):
+    """
+    Singular aproximado de uma palavra inglesa normalizada. Serve para
+    comparar palavras: aplicado aos dois lados, 'sprouts' e 'sprout' ficam
+    iguais, mesmo que o resultado nem sempre seja a palavra certa.
+    """
+    if len(word) <= 3 or word.endswith(('ss', 'us')):
+        return word
+    for ending, replacement in _ENGLISH_PLURAL_ENDINGS:
+        if word.endswith(ending):
+            return word[:-len(ending)] + replacement
+    return word
+
+
+def plural_forms(word):
+    """Plurais possíveis de uma palavra portuguesa normalizada (sem acentos)."""
+    if word.endswith('ao'):
+        return (word + 's', word[:-2] + 'oes', word[:-2] + 'aes')
+    if word.endswith(('r', 'z', 's')):
+        return (word + 'es',)
+    if word.endswith('l'):
+        return (word[:-1] + 'is',)
+    if word.endswith('m'):
+        return (word[:-1] + 'ns',)
+    return (word + 's',)
+
+
+def name_key(normalized_name):
+    """Chave de procura de um nome português normalizado (tuplo de palavras)."""
+    return tuple(singular(word) for word in normalized_name.split() if word not in PORTUGUESE_STOPWORDS)
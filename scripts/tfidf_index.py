@@ -0,0 +1,162 @@
+"""
+Similaridade TF-IDF de n-gramas de caracteres, em lote.
+
+Alternativa a SequenceMatcher para o matching da etapa 05: todos os nomes são
+vetorizados uma vez (n-gramas de caracteres com TF-IDF, normalizados L2) e
+as similaridades cosseno de todas as consultas contra a tabela saem de um
+único produto esparso consulta x tabela, com os k melhores por linha.
+
+As matrizes são esparsas em Python puro (uma linha = dicionário n-grama ->
+peso) e o produto é feito através das listas invertidas da tabela, por isso
+só os pares que partilham n-gramas são visitados. Não requer NumPy/SciPy.
+"""
+import heapq
+import math
+from collections import Counter
+
+NGRAM_SIZE = 3
+TOP_K = 10
+
+
+def padded_ngrams(text, n=NGRAM_SIZE):
+    """n-gramas de caracteres, com espaços nas pontas para marcar o início/fim."""
+    text = f' {text} '
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def fit_idf(texts, n=NGRAM_SIZE):
+    """IDF suavizado de cada n-grama: log((1 + N) / (1 + df)) + 1."""
+    document_frequency = Counter()
+    for text in texts:
+        document_frequency.update(padded_ngrams(text, n).keys())
+
+    total = len(texts)
+    return {
+        gram: math.log((1 + total) / (1 + df)) + 1
+        for gram, df in document_frequency.items()
+    }
+
+
+def transform(texts, idf, n=NGRAM_SIZE):
+    """Linhas TF-IDF normalizadas (n-gramas fora do vocabulário são ignorados)."""
+    rows = []
+    for text in texts:
+        row = {
+            gram: count * idf[gram]
+            for gram, count in padded_ngrams(text, n).items()
+            if gram in idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in row.values()))
+        rows.append({gram: weight / norm for gram, weight in row.items()} if norm else {})
+    return rows
+
+
+def build_postings(target_rows):
+    """Listas invertidas da tabela: n-grama -> [(posição, peso)]."""
+    postings = {}
+    for position, row in enumerate(target_rows):
+        for gram, weight in row.items():
+            postings.setdefault(gram, []).append((position, weight))
+    return postings
+
+
+def cosine_top_k(query_rows, postings, k=TOP_K, allowed=None, visited=None):
+    """
+    Produto esparso consultas x tabela^T com seleção dos k melhores.
+
+    Args:
+        query_rows: Linhas TF-IDF das consultas
+        postings: Listas invertidas da tabela (build_postings)
+        allowed: Se indicado, só estas posições da tabela são consideradas
+        visited: Se indicado, lista onde se junta, por consulta, o número de
+            posições da tabela visitadas (com algum n-grama em comum)
+
+    Returns:
+        Para cada linha de consulta, lista de (score, posição na tabela) por
+        ordem decrescente de score (empates pela posição)
+    """
+    results = []
+    for row in query_rows:
+        scores = Counter()
+        for gram, weight in row.items():
+            for position, target_weight in postings.get(gram, ()):
+                if allowed is None or position in allowed:
+                    scores[position] += weight * target_weight
+        if visited is not None:
+            visited.append(len(scores))
+        best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        results.append([(score, position) for position, score in best])
+    return results
+
+
+def restricted_top_k(best, k, threshold, allowed):
+    """
+    Os k melhores das posições allowed, a partir dos k melhores da tabela
+    (best, de cosine_top_k), quando chegam para o limiar: se sobram k, se
+    best não foi cortado (menos de k posições com score) ou se o último de
+    best já não passa o limiar, nenhuma posição allowed fora de best podia
+    entrar no resultado acima do limiar.
+
+    Returns:
+        Lista de (score, posição), ou None se for preciso recalcular
+    """
+    survivors = [(value, position) for value, position in best if position in allowed]
+    if len(survivors) >= k or len(best) < k or best[-1][0] <= threshold:
+        return survivors[:k]
+    return None
+
+
+def build_tfidf_scorer(target_texts, queries, k=TOP_K, idf_texts=None):
+    """
+    Vetoriza a tabela e as consultas conhecidas e calcula já os k melhores de
+    cada consulta. O IDF é ajustado sobre tabela + consultas, ou sobre
+    idf_texts se indicado (ex: a tabela completa quando target_texts é só um
+    subconjunto, para os scores serem comparáveis).
+
+    Returns:
+        score(query, threshold, allowed=None, trace=None) -> {posição: score}
+        dos candidatos com score > threshold, entre os k melhores da tabela
+        ou, com allowed, das posições allowed. Com allowed, os k melhores da
+        tabela são filtrados; só se os que sobram podem não ser os k melhores
+        de allowed acima do limiar (ver restricted_top_k) é que a consulta é
+        recalculada só sobre allowed. Consultas novas e consultas
+        recalculadas são guardadas. Com uma lista trace, junta-lhe um registo
+        da avaliação (ver rank_candidates na etapa 05).
+    """
+    queries = list(dict.fromkeys(queries))
+    idf = fit_idf(list(idf_texts if idf_texts is not None else target_texts) + queries)
+    postings = build_postings(transform(target_texts, idf))
+    visited = []
+    top = dict(zip(queries, cosine_top_k(transform(queries, idf), postings, k, visited=visited)))
+    # Consulta -> posições visitadas no produto esparso
+    visited = dict(zip(queries, visited))
+
+    def compute(key, query, allowed=None):
+        query_visited = []
+        top[key] = cosine_top_k(transform([query], idf), postings, k, allowed, query_visited)[0]
+        visited[key] = query_visited[0]
+
+    def score(query, threshold, allowed=None, trace=None):
+        if query not in top:
+            compute(query, query)
+        key = query
+        best = top[query]
+        if allowed is not None:
+            best = restricted_top_k(best, k, threshold, allowed)
+            if best is None:
+                key = (query, allowed)
+                if key not in top:
+                    compute(key, query, allowed)
+                best = top[key]
+        scores = {position: value for value, position in best if value > threshold}
+        if trace is not None:
+            trace.append({
+                'query': query,
+                'threshold': threshold,
+                'candidates': visited[key],
+                'evaluations': visited[key],
+                'passed': len(scores),
+            })
+        return scores
+
+    return score
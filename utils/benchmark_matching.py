@@ -0,0 +1,333 @@
+"""
+Benchmark e avaliação de qualidade do matching (etapas 05 e 07).
+
+Corre cada motor de matching sobre os dados completos, mede o tempo (melhor
+de --repeat execuções) e o pico de memória (tracemalloc), e compara o
+resultado com o conjunto etiquetado raw-data/matching_gold_set.json:
+
+- 05: o código INSA escolhido para cada alimento FODMAP tem de estar entre os
+  códigos aceites (lista vazia = o alimento não deve ter match)
+- 07: cada ingrediente detetado tem de pertencer a um dos grupos esperados, e
+  cada grupo esperado tem de ser encontrado
+
+Precisão, recall e F1 são calculados no total, por nível FODMAP e por tipo de
+match. O relatório vai para output/matching_benchmark.json.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Diretório base
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DATA_DIR = os.path.join(BASE_DIR, 'raw-data')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+SCRIPTS_DIR = os.path.join(BASE_DIR, 'scripts')
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+from fodmap_database import load_fodmap_database
+from text_normalization import normalize_name
+
+equivalences = importlib.import_module('05_create_equivalences')
+enhanced = importlib.import_module('07_create_enhanced_unified_database')
+
+GOLD_SET_FILE = os.path.join(RAW_DATA_DIR, 'matching_gold_set.json')
+REPORT_FILE = os.path.join(OUTPUT_DIR, 'matching_benchmark.json')
+
+
+def measure(function, repeat=3):
+    """
+    Corre function repeat vezes (tempo = a melhor) e mais uma com tracemalloc
+    para o pico de memória (o tracemalloc abranda a execução, por isso não
+    entra no tempo).
+
+    Returns:
+        Tuplo (resultado, {'seconds', 'peak_memory_mb'})
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {'seconds': round(best, 4), 'peak_memory_mb': round(peak / 2 ** 20, 2)}
+
+
+def scores(correct, wrong, found, missed):
+    """Precisão = correct / (correct + wrong), recall = found / (found + missed)."""
+    precision = correct / (correct + wrong) if correct + wrong else None
+    recall = found / (found + missed) if found + missed else None
+    f1 = None
+    if precision and recall:
+        f1 = 2 * precision * recall / (precision + recall)
+    return {
+        'precision': round(precision, 4) if precision is not None else None,
+        'recall': round(recall, 4) if recall is not None else None,
+        'f1': round(f1, 4) if f1 is not None else None,
+        'correct': correct,
+        'wrong': wrong,
+        'found': found,
+        'missed': missed,
+    }
+
+
+class Tally:
+    """Contadores de acertos/erros no total e por grupo (nível, tipo de match)."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, groups, correct=0, wrong=0, found=0, missed=0):
+        for group in ('total',) + tuple(groups):
+            counts = self.counts.setdefault(group, [0, 0, 0, 0])
+            counts[0] += correct
+            counts[1] += wrong
+            counts[2] += found
+            counts[3] += missed
+
+    def report(self):
+        report = {'total': scores(*self.counts.get('total', [0, 0, 0, 0]))}
+        for prefix in ('level', 'match_type'):
+            report[f'by_{prefix}'] = {
+                group.split(':', 1)[1]: scores(*counts)
+                for group, counts in sorted(self.counts.items())
+                if group.startswith(prefix + ':')
+            }
+        return report
+
+
+def evaluate_equivalences(gold, fodmap_foods, entries):
+    """
+    Avalia os matches da etapa 05 contra o gold set.
+
+    Args:
+        gold: Lista 'equivalences' do gold set
+        fodmap_foods: Alimentos FODMAP, pela ordem de entries
+        entries: Resultado de match_all() (entrada ou None por alimento)
+    """
+    predicted = {}
+    for fodmap_food, entry in zip(fodmap_foods, entries):
+        key = (fodmap_food['name'], fodmap_food['fodmap_level'], fodmap_food['category'])
+        predicted.setdefault(key, entry)
+
+    tally = Tally()
+    errors = []
+    for item in gold:
+        key = (item['fodmap_name'], item['fodmap_level'], item['fodmap_category'])
+        if key not in predicted:
+            raise KeyError(f"Alimento do gold set não existe na base FODMAP: {key}")
+        entry = predicted[key]
+        accepted = set(item['portuguese_codes'])
+        code = entry['portuguese_code'] if entry else None
+        groups = (f"level:{item['fodmap_level']}",
+                  f"match_type:{entry['match_type'] if entry else 'none'}")
+
+        if code is not None and code in accepted:
+            tally.add(groups, correct=1, found=1)
+            continue
+
+        tally.add(groups, wrong=int(code is not None), missed=int(bool(accepted)))
+        errors.append({
+            'fodmap_name': item['fodmap_name'],
+            'fodmap_level': item['fodmap_level'],
+            'predicted_code': code,
+            'predicted_name': entry['portuguese_name'] if entry else None,
+            'accepted_codes': item['portuguese_codes'],
+        })
+
+    return {**tally.report(), 'errors': errors}
+
+
+def detected_ingredients(entry):
+    """(nome FODMAP, nível) dos ingredientes detetados numa entrada da etapa 07."""
+    fodmap = entry['fodmap']
+    if not fodmap:
+        return []
+    info = fodmap['search_information']
+    if info['match_type'] == 'multiple_ingredients':
+        return [(ingredient['name_english'], ingredient['level']) for ingredient in info['ingredients']]
+    return [(info['name_english'], fodmap['level'])]
+
+
+def evaluate_ingredients(gold, fodmap_foods, entries):
+    """
+    Avalia a deteção de ingredientes da etapa 07 contra o gold set.
+
+    Um ingrediente detetado está certo se o seu nome pertence a algum grupo
+    esperado; um grupo é encontrado se algum dos seus nomes foi detetado. Os
+    grupos contam no nível do primeiro alimento FODMAP com o primeiro nome do
+    grupo.
+    """
+    level_by_name = {}
+    for fodmap_food in fodmap_foods:
+        level_by_name.setdefault(normalize_name(fodmap_food['name']), fodmap_food['fodmap_level'])
+
+    by_code = {entry['id']: entry for entry in entries}
+    tally = Tally()
+    errors = []
+    for item in gold:
+        if item['code'] not in by_code:
+            raise KeyError(f"Alimento do gold set não existe na tabela: {item['code']}")
+        entry = by_code[item['code']]
+        match_type = entry['fodmap']['search_information']['match_type'] if entry['fodmap'] else 'none'
+        detected = detected_ingredients(entry)
+        detected_names = {normalize_name(name) for name, _ in detected}
+        expected = [{normalize_name(name) for name in group} for group in item['ingredients']]
+        accepted = set().union(*expected)
+
+        wrong_names = []
+        for name, level in detected:
+            is_correct = normalize_name(name) in accepted
+            tally.add((f'level:{level}', f'match_type:{match_type}'),
+                      correct=int(is_correct), wrong=int(not is_correct))
+            if not is_correct:
+                wrong_names.append(name)
+
+        missed_groups = []
+        for group, names in zip(item['ingredients'], expected):
+            is_found = bool(names & detected_names)
+            level = level_by_name.get(normalize_name(group[0]), 'unknown')
+            tally.add((f'level:{level}', f'match_type:{match_type}'),
+                      found=int(is_found), missed=int(not is_found))
+            if not is_found:
+                missed_groups.append(group)
+
+        if wrong_names or missed_groups:
+            errors.append({
+                'code': item['code'],
+                'name': item['name'],
+                'wrong': wrong_names,
+                'missed': missed_groups,
+            })
+
+    return {**tally.report(), 'errors': errors}
+
+
+def benchmark_equivalences(gold, fodmap_foods, pt_foods, backends, repeat):
+    """
+    Motores da etapa 05, sem cache: cada backend de similaridade como a etapa
+    corre por omissão (nomes pt-PT e crosswalk de categorias), só com os
+    nomes em inglês ('<backend>-english') e, além disso, contra a tabela
+    completa ('<backend>-full').
+    """
+    english_foods = [{key: value for key, value in food.items() if key != 'name_pt'} for food in fodmap_foods]
+
+    results = {}
+    for backend in backends:
+        for engine, foods, crosswalk in ((backend, fodmap_foods, True),
+                                         (f'{backend}-english', english_foods, True),
+                                         (f'{backend}-full', english_foods, False)):
+            print(f"05 [{engine}]...")
+            entries, performance = measure(
+                lambda: equivalences.match_all(foods, pt_foods, backend, crosswalk=crosswalk), repeat)
+            results[engine] = {
+                **performance,
+                'total_matches': sum(entry is not None for entry in entries),
+                'quality': evaluate_equivalences(gold, fodmap_foods, entries),
+            }
+    return results
+
+
+def benchmark_ingredients(gold, fodmap_foods, nutritional_data, repeat):
+    """Motor da etapa 07: índice FODMAP + deteção por palavras-chave."""
+    def run():
+        fodmap_index = enhanced.build_fodmap_index(fodmap_foods)
+        containment_index = enhanced.build_containment_index(fodmap_index, enhanced.english_keywords())
+        name_ids = enhanced.build_name_ids(fodmap_foods)
+        return [enhanced.build_unified_entry(food, fodmap_index, containment_index, name_ids)[0]
+                for food in nutritional_data]
+
+    print("07 [keywords]...")
+    entries, performance = measure(run, repeat)
+    return {
+        'keywords': {
+            **performance,
+            'foods_with_fodmap': sum(entry['fodmap'] is not None for entry in entries),
+            'quality': evaluate_ingredients(gold, fodmap_foods, entries),
+        }
+    }
+
+
+def print_summary(report):
+    print(f"\n{'ETAPA':<6} {'MOTOR':<16} {'TEMPO (s)':>10} {'PICO (MB)':>10} "
+          f"{'PRECISÃO':>9} {'RECALL':>7} {'F1':>7}")
+    print("-" * 70)
+    for stage in ('05', '07'):
+        for engine, result in report.get(stage, {}).items():
+            total = result['quality']['total']
+            values = [total[key] for key in ('precision', 'recall', 'f1')]
+            formatted = [f"{value:.3f}" if value is not None else '-' for value in values]
+            print(f"{stage:<6} {engine:<16} {result['seconds']:>10.3f} {result['peak_memory_mb']:>10.2f} "
+                  f"{formatted[0]:>9} {formatted[1]:>7} {formatted[2]:>7}")
+
+
+def run_benchmark(stages=('05', '07'), backends=None, repeat=3, output_path=REPORT_FILE):
+    """
+    Corre o benchmark e grava o relatório.
+
+    Args:
+        stages: Etapas a medir ('05', '07')
+        backends: Backends da etapa 05 (por omissão, todos)
+        repeat: Execuções por motor para o tempo
+        output_path: Caminho do relatório JSON
+    """
+    with open(GOLD_SET_FILE, 'r', encoding='utf-8') as f:
+        gold = json.load(f)
+
+    fodmap_foods = load_fodmap_database()['foods']
+    report = {
+        'metadata': {
+            'gold_set': os.path.relpath(GOLD_SET_FILE, BASE_DIR),
+            'gold_equivalences': len(gold['equivalences']),
+            'gold_ingredients': len(gold['ingredients']),
+            'total_fodmap_foods': len(fodmap_foods),
+            'repeat': repeat,
+            'python': platform.python_version(),
+        }
+    }
+
+    if '05' in stages:
+        with open(os.path.join(RAW_DATA_DIR, 'portuguese_food_names.json'), 'r', encoding='utf-8') as f:
+            pt_foods = json.load(f)['foods']
+        equivalences.attach_portuguese_names(fodmap_foods)
+        report['05'] = benchmark_equivalences(
+            gold['equivalences'], fodmap_foods, pt_foods,
+            backends or equivalences.SIMILARITY_BACKENDS, repeat)
+
+    if '07' in stages:
+        with open(os.path.join(OUTPUT_DIR, 'tabela_alimentar_formatada.json'), 'r', encoding='utf-8') as f:
+            nutritional_data = json.load(f)
+        report['07'] = benchmark_ingredients(gold['ingredients'], fodmap_foods, nutritional_data, repeat)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_summary(report)
+    print(f"\n✓ Relatório: {os.path.relpath(output_path, BASE_DIR)}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark de tempo, memória e qualidade do matching.')
+    parser.add_argument('--stages', nargs='+', choices=['05', '07'], default=['05', '07'],
+                        help='Etapas a medir (por omissão, 05 e 07)')
+    parser.add_argument('--backends', nargs='+', choices=equivalences.SIMILARITY_BACKENDS,
+                        help='Backends da etapa 05 (por omissão, todos)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Execuções por motor; o tempo é o da mais rápida (por omissão 3)')
+    parser.add_argument('--output', default=REPORT_FILE,
+                        help='Caminho do relatório (por omissão output/matching_benchmark.json)')
+    args = parser.parse_args()
+
+    run_benchmark(stages=args.stages, backends=args.backends, repeat=args.repeat, output_path=args.output)
@@ -1,16 +1,25 @@
 import json
 import os
+import sys
 
 # Diretório base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+sys.path.insert(0, os.path.join(BASE_DIR, 'scripts'))
+
+from fodmap_database import load_fodmap_database
+
+def format_grams(item):
+    """Equivalente em gramas da porção, se conhecido (ex: ' (≈120 g)')."""
+    portion = item.get('portion')
+    if portion and portion['grams'] is not None:
+        return f" (≈{portion['grams']:g} g)"
+    return ""
 
 def display_fodmap_summary():
     """
     Exibe um resumo detalhado do banco de dados FODMAP.
     """
-    with open(os.path.join(OUTPUT_DIR, 'fodmap_database.json'), 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_fodmap_database()
     
     print("=" * 80)
     print("BANCO DE DADOS FODMAP - RESUMO COMPLETO")
@@ -52,14 +61,14 @@ def display_fodmap_summary():
                 for item in high_items:
                     print(f"     • {item['name']}")
                     if item['portion_note']:
-                        print(f"       Porção: {item['portion_note']}")
+                        print(f"       Porção: {item['portion_note']}{format_grams(item)}")
             
             if low_items:
                 print(f"\n  ✅ LOW FODMAP (seguro):")
                 for item in low_items:
                     print(f"     • {item['name']}")
                     if item['portion_note']:
-                        print(f"       Porção: {item['portion_note']}")
+                        print(f"       Porção: {item['portion_note']}{format_grams(item)}")
     
     # Estrutura de exemplo para integração
     print(f"\n" + "=" * 80)
@@ -79,6 +88,7 @@ def display_fodmap_summary():
       "category": "Categoria principal (Vegetables, Fruit, etc)",
       "fodmap_level": "high" ou "low",
       "portion_note": "Informação de porção segura/perigosa",
+      "portion": {"comparator": "<=", "quantity": 0.5, "unit": "cup", "grams": 120.0},
       "additional_notes": "Notas adicionais",
       "normalized_name": "nome normalizado para matching"
     }
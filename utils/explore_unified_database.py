@@ -13,6 +13,7 @@ def explore_unified_database():
     
     metadata = data['metadata']
     foods = data['foods']
+    units = metadata.get('nutrient_units', {})
     
     print("=" * 100)
     print("EXPLORAÇÃO DO BANCO DE DADOS UNIFICADO")
@@ -81,7 +82,8 @@ def explore_unified_database():
     for food in free_with_nutrition:
         name = food['name'][:49]
         kcal = food['nutrition']['energy_kcal'] if food['nutrition']['energy_kcal'] else 'N/A'
-        protein = food['nutrition']['macronutrients']['protein_g'] if food['nutrition']['macronutrients']['protein_g'] else 'N/A'
+        protein = food['nutrition']['macronutrients']['protein_g']
+        protein = f"{protein}{units.get('protein_g', '')}" if protein is not None else 'N/A'
         print(f"{name:<50} {str(kcal):<12} {protein:<15}")
     
     # Alimentos LOW FODMAP ricos em nutrientes
@@ -96,21 +98,12 @@ def explore_unified_database():
         and f['nutrition']['macronutrients']['fiber_g']
     ]
     
-    # Ordenar por fibra (extrair valor numérico)
-    def get_fiber_value(food):
-        fiber = food['nutrition']['macronutrients']['fiber_g']
-        if fiber:
-            try:
-                return float(fiber.replace('g', ''))
-            except:
-                return 0
-        return 0
-    
-    low_with_fiber.sort(key=get_fiber_value, reverse=True)
+    # Ordenar por fibra (valores já numéricos)
+    low_with_fiber.sort(key=lambda f: f['nutrition']['macronutrients']['fiber_g'], reverse=True)
     
     for food in low_with_fiber[:10]:
         name = food['name'][:49]
-        fiber = food['nutrition']['macronutrients']['fiber_g'] if food['nutrition']['macronutrients']['fiber_g'] else 'N/A'
+        fiber = f"{food['nutrition']['macronutrients']['fiber_g']}{units.get('fiber_g', '')}"
         portion = food['fodmap_portion_note'][:29] if food['fodmap_portion_note'] else '-'
         print(f"{name:<50} {fiber:<12} {portion:<30}")
     
@@ -154,7 +147,7 @@ def explore_unified_database():
     print("   • fodmap_match_score - Score de confiança do match (0-1)")
     print("   • fodmap_match_type - Tipo de match usado")
     
-    print(f"\n🥗 CAMPOS NUTRICIONAIS (50+ campos):")
+    print(f"\n🥗 CAMPOS NUTRICIONAIS (50+ campos, valores numéricos):")
     print("   • nutrition.energy_kcal / energy_kj")
     print("   • nutrition.macronutrients.*")
     print("     - lipids_g, saturated_fatty_acids_g, carbohydrates_g,")
@@ -163,6 +156,7 @@ def explore_unified_database():
     print("     - vitamin_a_ug, vitamin_c_mg, vitamin_d_ug, etc")
     print("   • nutrition.minerals.*")
     print("     - sodium_mg, potassium_mg, calcium_mg, iron_mg, etc")
+    print("   • metadata.nutrient_units - Unidade de cada campo (g, mg, µg, kcal, kJ)")
     
     print(f"\n" + "=" * 100)
     print("✓ EXPLORAÇÃO COMPLETA DO BANCO DE DADOS")
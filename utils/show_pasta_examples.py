@@ -30,8 +30,11 @@ for i, prato in enumerate(massas[:10], 1):
     
     # Mostrar dados nutricionais se disponíveis
     if 'nutrition' in prato and prato['nutrition'].get('macronutrients'):
-        carbs = prato['nutrition']['macronutrients'].get('carbohydrates_g', 'N/A')
-        protein = prato['nutrition']['macronutrients'].get('protein_g', 'N/A')
+        units = db['metadata'].get('nutrient_units', {})
+        carbs = prato['nutrition']['macronutrients'].get('carbohydrates_g')
+        protein = prato['nutrition']['macronutrients'].get('protein_g')
+        carbs = f"{carbs}{units.get('carbohydrates_g', '')}" if carbs is not None else 'N/A'
+        protein = f"{protein}{units.get('protein_g', '')}" if protein is not None else 'N/A'
         print(f"   Nutrição: Carboidratos {carbs}, Proteína {protein}")
 
 print("\n" + "="*80)
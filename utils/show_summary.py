@@ -36,11 +36,11 @@ print("\n📁 ARQUIVOS CRIADOS")
 print("-" * 80)
 print("1. fodmap_database.json")
 print("   └─ Base completa FODMAP com 559 alimentos")
-print("   └─ Estrutura: foods, by_category, by_level")
+print("   └─ Estrutura: foods, by_category, by_level (índices em foods)")
 print("")
 print("2. tabela_alimentar_formatada.json")
 print("   └─ Tabela nutricional portuguesa com 1372 alimentos")
-print("   └─ Todos os campos com unidades (g, mg, µg, kcal, kJ)")
+print("   └─ Valores numéricos; unidades (g, mg, µg, kcal, kJ) no nome de cada campo")
 print("")
 print("3. portuguese_food_names.json")
 print("   └─ Lista de nomes extraídos para matching")
@@ -72,13 +72,13 @@ print("""
   "category_level_1": "Frutos e produtos derivados de frutos",
   "energy_kcal": 176.0,
   "energy_kj": 726.0,
-  "lipids_g": "17.4g",
-  "sugars_g": "2.3g",
-  "protein_g": "1.1g",
-  "fiber_g": "3g",
-  "vitamin_c_mg": "3mg",
-  "calcium_mg": "4mg",
-  ...50+ campos nutricionais
+  "lipids_g": 17.4,
+  "sugars_g": 2.3,
+  "protein_g": 1.1,
+  "fiber_g": 3.0,
+  "vitamin_c_mg": 3.0,
+  "calcium_mg": 4.0,
+  ...50+ campos nutricionais (numéricos; unidade no sufixo do nome)
 }
 """)
 